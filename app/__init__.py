@@ -2,6 +2,8 @@ from flask import Flask
 import os
 from app.models.model import db
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app import db_pool, metrics, tenancy
 
 def create_app():
     app = Flask(__name__)
@@ -14,7 +16,69 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI']=database_url
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS']= False
 
+    # Connection pool and statement timeouts (see app.db_pool); per-route
+    # timeouts are "endpoint=ms,..." e.g. "report.generate_report=120000"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_pool.engine_options(database_url)
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    app.config['DB_ROUTE_STATEMENT_TIMEOUTS'] = db_pool.route_timeouts(os.environ.get('DB_ROUTE_STATEMENT_TIMEOUTS'))
+    app.config['DB_TIMING_HEADER'] = os.environ.get('DB_TIMING_HEADER', '1') == '1'
+
+    # Prometheus metrics at /metrics (see app.metrics): 404 until
+    # METRICS_TOKEN is set, then "Authorization: Bearer <token>" is required.
+    # Requests slower than SLOW_REQUEST_SECONDS are logged (0 disables).
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['SLOW_REQUEST_SECONDS'] = float(os.environ.get('SLOW_REQUEST_SECONDS', 1.0))
+
+    # Password hashing (see app.models.passwords): a werkzeug method string
+    # with its parameters; stored hashes are upgraded on the next login after
+    # it changes. Failed sign-ins are limited per account and per address;
+    # the counts live in each process, so every gunicorn worker allows the
+    # full number of attempts (see AttemptLimiter).
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 16))
+    app.config['PASSWORD_HASH_WAIT'] = float(os.environ.get('PASSWORD_HASH_WAIT', 5))
+    app.config['LOGIN_MAX_ACCOUNT_ATTEMPTS'] = int(os.environ.get('LOGIN_MAX_ACCOUNT_ATTEMPTS', 5))
+    app.config['LOGIN_MAX_IP_ATTEMPTS'] = int(os.environ.get('LOGIN_MAX_IP_ATTEMPTS', 50))
+    app.config['LOGIN_ATTEMPT_WINDOW'] = int(os.environ.get('LOGIN_ATTEMPT_WINDOW', 15 * 60))
+
+    # Number of proxies in front of the app (1 on Render). Their
+    # X-Forwarded-For / -Proto headers are trusted, so request.remote_addr is
+    # the client rather than the proxy; leave at 0 when clients connect directly.
+    app.config['PROXY_FIX_X_FOR'] = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    if app.config['PROXY_FIX_X_FOR']:
+        hops = app.config['PROXY_FIX_X_FOR']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    # Background report rendering (see app.models.report_jobs)
+    app.config['REPORT_JOBS_DIR'] = os.environ.get('REPORT_JOBS_DIR', os.path.join(app.instance_path, 'report_jobs'))
+    app.config['REPORT_WORKERS'] = int(os.environ.get('REPORT_WORKERS', 2))
+
+    # On-disk cache of rendered reports (see app.models.report_cache)
+    app.config['REPORT_CACHE_DIR'] = os.environ.get('REPORT_CACHE_DIR', os.path.join(app.instance_path, 'report_cache'))
+    app.config['REPORT_CACHE_MAX_MB'] = int(os.environ.get('REPORT_CACHE_MAX_MB', 200))
+    app.config['REPORT_CACHE_MAX_AGE'] = int(os.environ.get('REPORT_CACHE_MAX_AGE', 7 * 24 * 60 * 60))
+
+    # Chat assistant retrieval (see app.models.chat_index)
+    app.config['CHAT_TOP_K'] = int(os.environ.get('CHAT_TOP_K', 25))
+    app.config['CHAT_CONTEXT_CHARS'] = int(os.environ.get('CHAT_CONTEXT_CHARS', 6000))
+    app.config['CHAT_INDEX_TTL'] = int(os.environ.get('CHAT_INDEX_TTL', 300))
+    app.config['CHAT_INDEX_PERIODS'] = int(os.environ.get('CHAT_INDEX_PERIODS', 3))
+
+    # Chat completion API (see app.models.chat_client); point SARVAM_BASE_URL
+    # at a local stub to run without the real service
+    app.config['SARVAM_API_KEY'] = os.environ.get('SARVAM_API_KEY')
+    app.config['SARVAM_BASE_URL'] = os.environ.get('SARVAM_BASE_URL', 'https://api.sarvam.ai')
+    app.config['CHAT_TIMEOUT'] = float(os.environ.get('CHAT_TIMEOUT', 60))
+    app.config['CHAT_CONNECT_TIMEOUT'] = float(os.environ.get('CHAT_CONNECT_TIMEOUT', 5))
+    app.config['CHAT_MAX_CONNECTIONS'] = int(os.environ.get('CHAT_MAX_CONNECTIONS', 10))
+    app.config['CHAT_CACHE_SIZE'] = int(os.environ.get('CHAT_CACHE_SIZE', 256))
+    app.config['CHAT_CACHE_TTL'] = int(os.environ.get('CHAT_CACHE_TTL', 600))
+
     db.init_app(app)
+    db_pool.init_app(app)
+    metrics.init_app(app)
+    tenancy.init_app(app)
     migrate = Migrate(app, db)
 
     from app.routes.auth import auth_bp
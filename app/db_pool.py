@@ -0,0 +1,111 @@
+from flask import current_app, g, request, has_app_context, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+import logging
+import os
+import time
+
+# Connection pool settings from the environment, a per-route statement
+# timeout, and per-request accounting of time spent in SQL and waiting for a
+# pooled connection (sent back in a Server-Timing header and logged), which
+# is what gunicorn worker counts should be sized against.
+
+logger = logging.getLogger(__name__)
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if has_app_context():
+                g.db_checkout_wait = g.get('db_checkout_wait', 0.0) + time.perf_counter() - start
+
+def _flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+def engine_options(database_url):
+    """SQLALCHEMY_ENGINE_OPTIONS from DB_* environment variables."""
+    options = {
+        'pool_pre_ping': _flag('DB_POOL_PRE_PING', '1'),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    # SQLite picks its own pool class; sizing only applies to server databases
+    if not database_url.startswith('sqlite'):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        )
+    return options
+
+def route_timeouts(value):
+    """Parse ``"endpoint=ms,endpoint=ms"`` into a dict."""
+    timeouts = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            endpoint, ms = item.split('=', 1)
+            timeouts[endpoint.strip()] = int(ms)
+    return timeouts
+
+def statement_timeout(config):
+    """Statement timeout in ms for the current request (0 means none).
+
+    CLI commands and background jobs run without a request and get none.
+    """
+    if not has_request_context():
+        return 0
+    return config['DB_ROUTE_STATEMENT_TIMEOUTS'].get(request.endpoint, config['DB_STATEMENT_TIMEOUT_MS'])
+
+@event.listens_for(Session, 'after_begin')
+def _set_statement_timeout(session, transaction, connection):
+    if connection.dialect.name != 'postgresql' or not has_app_context():
+        return
+    timeout = statement_timeout(current_app.config)
+    if timeout:
+        # Scoped to this transaction, so pooled connections keep no state
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
+
+def init_app(app):
+    """Record DB time and checkout wait for each request of ``app``."""
+    @app.before_request
+    def _start_db_timing():
+        g.db_time = 0.0
+        g.db_statements = 0
+        g.db_checkout_wait = 0.0
+
+    @app.after_request
+    def _report_db_timing(response):
+        if 'db_time' not in g:
+            return response
+        db_ms = g.db_time * 1000
+        wait_ms = g.db_checkout_wait * 1000
+        if app.config['DB_TIMING_HEADER']:
+            response.headers.add(
+                'Server-Timing', f'db;dur={db_ms:.1f};desc="{g.db_statements} queries", db-wait;dur={wait_ms:.1f}'
+            )
+        logger.debug('%s %s db=%.1fms queries=%d checkout_wait=%.1fms',
+                     request.method, request.path, db_ms, g.db_statements, wait_ms)
+        return response
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_app_context() and 'db_time' in g:
+        g.db_time += elapsed
+        g.db_statements += 1
+
+@event.listens_for(Engine, 'handle_error')
+def _execute_failed(context):
+    # after_cursor_execute does not run for a failed statement
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
@@ -0,0 +1,185 @@
+from bisect import bisect_left
+from flask import Blueprint, Response, current_app, g, request
+import logging
+import math
+import threading
+import time
+
+# Minimal Prometheus instrumentation: per-endpoint request latency, SQL time
+# and statement count per request (collected by the engine hooks in
+# app.db_pool), PDF render time and chat API latency, exposed in the text
+# exposition format at /metrics. Values are per process; with several
+# gunicorn workers each scrape sees the worker that answered it.
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RENDER_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_registry = []
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{le} {cumulative}'
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+class _Timer:
+    """Context manager observing the seconds spent inside it."""
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by endpoint.',
+    ['blueprint', 'endpoint', 'method'],
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Responses sent, by endpoint and status code.',
+    ['blueprint', 'endpoint', 'method', 'status'],
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds', 'Time spent executing SQL per request.',
+    ['blueprint', 'endpoint'],
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    'http_request_db_statements', 'SQL statements executed per request.',
+    ['blueprint', 'endpoint'], buckets=COUNT_BUCKETS,
+)
+REQUEST_DB_CHECKOUT_WAIT = Histogram(
+    'http_request_db_checkout_wait_seconds', 'Time spent waiting for a pooled connection per request.',
+    ['blueprint'],
+)
+REPORT_RENDER = Histogram(
+    'report_render_seconds', 'Time to query and render a PDF report, by report type.',
+    ['report_type'], buckets=RENDER_BUCKETS,
+)
+CHAT_COMPLETION = Histogram(
+    'chat_completion_seconds', 'Latency of calls to the chat completion API.',
+    ['mode', 'outcome'], buckets=RENDER_BUCKETS,
+)
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return '\n'.join(lines) + '\n'
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics')
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    # Not served at all until a token is configured
+    if not token:
+        return Response('Not Found\n', status=404, mimetype='text/plain')
+    if request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+def init_app(app):
+    """Time every request of ``app`` and serve /metrics."""
+    app.register_blueprint(metrics_bp)
+
+    @app.before_request
+    def _start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        if 'request_start' not in g or request.endpoint == 'metrics.metrics':
+            return response
+        elapsed = time.perf_counter() - g.request_start
+        # Unmatched URLs share one label so 404 scans cannot explode the series
+        endpoint = request.endpoint or 'unmatched'
+        blueprint = request.blueprint or ''
+
+        REQUEST_LATENCY.observe(elapsed, blueprint=blueprint, endpoint=endpoint, method=request.method)
+        REQUESTS.inc(blueprint=blueprint, endpoint=endpoint, method=request.method, status=str(response.status_code))
+        if 'db_time' in g:
+            REQUEST_DB_TIME.observe(g.db_time, blueprint=blueprint, endpoint=endpoint)
+            REQUEST_DB_STATEMENTS.observe(g.db_statements, blueprint=blueprint, endpoint=endpoint)
+            REQUEST_DB_CHECKOUT_WAIT.observe(g.db_checkout_wait, blueprint=blueprint)
+
+        threshold = app.config['SLOW_REQUEST_SECONDS']
+        if threshold and elapsed >= threshold:
+            logger.warning(
+                'Slow request: %s %s (%s) took %.3fs, %d SQL statements in %.3fs, %.3fs waiting for a connection',
+                request.method, request.path, endpoint, elapsed,
+                g.get('db_statements', 0), g.get('db_time', 0.0), g.get('db_checkout_wait', 0.0),
+            )
+        return response
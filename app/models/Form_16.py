@@ -1,28 +1,10 @@
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from reportlab.platypus import Spacer
 from reportlab.lib.units import inch
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import HRFlowable
+from app.models.report_templates import document, title_block, table, cached_header, DETAILS_GRID, SUMMARY_GRID
 
-def generate_form16(filename="Form16_FY_2025_26.pdf", data=None, company=None):
-
-    if data is None:
-        data = {}
-    if company is None:
-        company = {}
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    elements = []
-
-    styles = getSampleStyleSheet()
-
-    # Title
-    elements.append(Paragraph("FORM 16 - TAX DEDUCTION CERTIFICATE (Part A)", styles["Heading1"]))
-    elements.append(Spacer(1, 0.1 * inch))
-    elements.append(Paragraph("Certificate under Section 203 of Income Tax Act", styles["Normal"]))
-    elements.append(Spacer(1, 0.2 * inch))
-    elements.append(HRFlowable(width="100%"))
-    elements.append(Spacer(1, 0.2 * inch))
+def _header(company):
+    yield from title_block("FORM 16 - TAX DEDUCTION CERTIFICATE (Part A)",
+                           "Certificate under Section 203 of Income Tax Act")
 
     # Employer Details
     employer_data = [
@@ -31,15 +13,17 @@ def generate_form16(filename="Form16_FY_2025_26.pdf", data=None, company=None):
         ["PAN:", company.get('pan', "AAAPZ1234C")],
         ["TAN:", company.get('tan', "DELC12345D")]
     ]
+    yield table(employer_data, [120, 300], DETAILS_GRID)
+    yield Spacer(1, 0.3 * inch)
 
-    employer_table = Table(employer_data, colWidths=[120, 300])
-    employer_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-    ]))
+def generate_form16(filename="Form16_FY_2025_26.pdf", data=None, company=None, progress=None):
 
-    elements.append(employer_table)
-    elements.append(Spacer(1, 0.3 * inch))
+    if data is None:
+        data = {}
+    if company is None:
+        company = {}
+    doc = document(filename, progress=progress)
+    elements = list(cached_header('form16', company, _header))
 
     # Employee Details
     employee_data = [
@@ -50,13 +34,7 @@ def generate_form16(filename="Form16_FY_2025_26.pdf", data=None, company=None):
         ["Salary Period:", data.get('period', "FY 2025-26 (April 2025 - March 2026)")]
     ]
 
-    employee_table = Table(employee_data, colWidths=[120, 300])
-    employee_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-    ]))
-
-    elements.append(employee_table)
+    elements.append(table(employee_data, [120, 300], DETAILS_GRID))
     elements.append(Spacer(1, 0.3 * inch))
 
     # Tax Summary Section
@@ -69,14 +47,8 @@ def generate_form16(filename="Form16_FY_2025_26.pdf", data=None, company=None):
         ["Taxable Salary:", data.get('taxable_salary', "Rs. 1,55,200")]
     ]
 
-    tax_table = Table(tax_data, colWidths=[200, 220])
-    tax_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.grey),
-    ]))
-
-    elements.append(tax_table)
+    elements.append(table(tax_data, [200, 220], SUMMARY_GRID))
 
     doc.build(elements)
 
-    print("✅ Form 16 PDF Generated Successfully!")
\ No newline at end of file
+    print("✅ Form 16 PDF Generated Successfully!")
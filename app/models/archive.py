@@ -0,0 +1,97 @@
+from datetime import date
+from sqlalchemy import delete, insert, select
+from app.models.model import Payroll, Attendance, PayrollArchive, AttendanceArchive, financial_year, db
+from app.tenancy import current_company
+
+# Closing a financial year (April to March) moves its payroll and attendance
+# rows out of the hot tables into payrolls_archive / attendance_archive, so
+# the ledger, payroll generation and report scans only touch the open years.
+# Everything up to the end of the closed year is moved and the company's
+# ``archived_through`` period marks the boundary: reads of a period pick
+# their table with payroll_model() / attendance_model(). Archived periods are
+# final; they can no longer be generated, deleted or have attendance changed.
+
+ARCHIVES = {Payroll: PayrollArchive, Attendance: AttendanceArchive}
+
+def financial_year_label(start_year):
+    return f'{start_year}-{(start_year + 1) % 100:02d}'
+
+def year_end(start_year):
+    """Last pay period (March) of the financial year starting in ``start_year``."""
+    return (start_year + 1) * 100 + 3
+
+def archived_through():
+    """Last archived period of the current company, or None."""
+    company = current_company()
+    return company.archived_through if company else None
+
+def is_archived(period):
+    boundary = archived_through()
+    return boundary is not None and period <= boundary
+
+def payroll_model(period):
+    """Payroll or PayrollArchive, whichever holds ``period``."""
+    return PayrollArchive if is_archived(period) else Payroll
+
+def attendance_model(period):
+    """Attendance or AttendanceArchive, whichever holds ``period``."""
+    return AttendanceArchive if is_archived(period) else Attendance
+
+def split_periods(model, periods):
+    """``(table, periods)`` pairs of ``model`` and its archive covering ``periods``."""
+    boundary = archived_through()
+    hot = [p for p in periods if boundary is None or p > boundary]
+    archived = [p for p in periods if boundary is not None and p <= boundary]
+    return [(table, table_periods) for table, table_periods in ((model, hot), (ARCHIVES[model], archived))
+            if table_periods]
+
+def payroll_history(employee_id):
+    """All payrolls of one employee, newest first, open years then archived ones."""
+    return [
+        row
+        for model in (Payroll, PayrollArchive)
+        for row in model.query.filter_by(employee_id=employee_id).order_by(model.period.desc()).all()
+    ]
+
+def check_open(period):
+    """Raise ValueError if ``period`` belongs to a closed financial year."""
+    if is_archived(period):
+        raise ValueError(f'Financial year {financial_year_label(financial_year(period))} is closed')
+
+def close_financial_year(start_year, today=None):
+    """Archive payroll and attendance up to the end of financial year ``start_year``.
+
+    Runs for the current company and commits. Returns the number of rows
+    moved per table.
+    """
+    company = current_company()
+    if company is None:
+        raise ValueError('Set up the company first')
+    last_period = year_end(start_year)
+    today = today or date.today()
+    if today.year * 100 + today.month <= last_period:
+        raise ValueError(f'Financial year {financial_year_label(start_year)} has not ended yet')
+    if company.archived_through is not None and last_period <= company.archived_through:
+        raise ValueError(f'Financial year {financial_year_label(start_year)} is already closed')
+
+    moved = {}
+    try:
+        for model, archive in ARCHIVES.items():
+            names = [column.key for column in archive.__table__.columns if column.key not in ('id', 'source_id')]
+            # The SELECT inside INSERT ... SELECT is not tenant-filtered; filter it here
+            rows = select(model.id, *(getattr(model, name) for name in names)).filter(
+                model.company_id == company.id, model.period <= last_period
+            )
+            moved[model.__tablename__] = db.session.execute(
+                insert(archive).from_select(['source_id', *names], rows)
+            ).rowcount
+            db.session.execute(
+                delete(model).where(model.company_id == company.id, model.period <= last_period)
+                .execution_options(synchronize_session=False)
+            )
+        company.archived_through = last_period
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return moved
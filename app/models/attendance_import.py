@@ -0,0 +1,178 @@
+from sqlalchemy import tuple_
+from app.models.model import Employee, Attendance, MONTHS, period_key, dialect_insert, db
+from app.models.pdf_stream import chunked
+from app.models.employee_import import read_rows, cell_text
+from app.models.rollup import record_attendance_rows
+from app.models.archive import archived_through
+from app.tenancy import current_company_id
+
+# Attendance from biometric / HR exports. Rows are streamed from the file,
+# staged a chunk at a time, and each chunk is applied with one
+# INSERT ... ON CONFLICT (company_id, employee_id, period) DO UPDATE, so
+# re-sending a month just overwrites it. The whole file is one transaction.
+
+CHUNK_SIZE = 500
+
+# Per-row problems kept in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+REQUIRED = ['month', 'year', 'present_days']
+
+class AttendanceResult:
+    """Counts and per-row errors of one ingestion."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, row_number, messages):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': messages})
+
+    def to_dict(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'rejected': self.rejected,
+            'errors': sorted(self.errors, key=lambda e: e['row']),
+            'errors_truncated': self.rejected > len(self.errors),
+        }
+
+def _month_name(value):
+    """Full month name for a name, abbreviation or number (1-12)."""
+    if value.isdigit() and 1 <= int(value) <= 12:
+        return MONTHS[int(value) - 1]
+    for month in MONTHS:
+        if value.lower() in (month.lower(), month[:3].lower()):
+            return month
+    raise ValueError
+
+def _parse_row(record):
+    """``(values, errors)``; values has employee_id or email, month, year, period, present_days."""
+    values = {key: cell_text(record.get(key)) for key in ('employee_id', 'email', 'month', 'year', 'present_days')}
+    errors = [f'{key} is required' for key in REQUIRED if values[key] is None]
+    if values['employee_id'] is None and values['email'] is None:
+        errors.append('employee_id or email is required')
+
+    if values['employee_id'] is not None:
+        if values['employee_id'].isdigit():
+            values['employee_id'] = int(values['employee_id'])
+        else:
+            errors.append('employee_id must be a number')
+    if values['month'] is not None:
+        try:
+            values['month'] = _month_name(values['month'])
+        except ValueError:
+            errors.append('month must be a month name or number')
+    if values['year'] is not None:
+        if values['year'].isdigit() and 1900 < int(values['year']) < 3000:
+            values['year'] = int(values['year'])
+        else:
+            errors.append('year is not valid')
+    if values['present_days'] is not None:
+        try:
+            values['present_days'] = float(values['present_days'])
+            if not 0 <= values['present_days'] <= 31:
+                errors.append('present_days must be between 0 and 31')
+        except ValueError:
+            errors.append('present_days must be a number')
+
+    if not errors:
+        values['period'] = period_key(values['month'], values['year'])
+    return values, errors
+
+def _resolve_employees(staged):
+    """Fill in employee_id from email; return the ids that exist."""
+    emails = {v['email'] for _, v in staged if v['employee_id'] is None}
+    by_email = {}
+    if emails:
+        by_email = dict(db.session.query(Employee.email, Employee.id).filter(Employee.email.in_(emails)))
+    for _, values in staged:
+        if values['employee_id'] is None:
+            values['employee_id'] = by_email.get(values['email'])
+
+    ids = {v['employee_id'] for _, v in staged if v['employee_id'] is not None}
+    known = {id for id, in db.session.query(Employee.id).filter(Employee.id.in_(ids))} if ids else set()
+    return known
+
+def upsert_attendance(rows):
+    """Insert or overwrite attendance ``rows`` (employee_id, month, year, period, present_days).
+
+    Keys must be unique within ``rows``. Period summaries are adjusted; the
+    caller commits. Returns ``(inserted, updated)``.
+    """
+    if not rows:
+        return 0, 0
+    keys = [(r['employee_id'], r['period']) for r in rows]
+    previous = dict(
+        ((employee_id, period), days) for employee_id, period, days in
+        db.session.query(Attendance.employee_id, Attendance.period, Attendance.present_days)
+        .filter(tuple_(Attendance.employee_id, Attendance.period).in_(keys))
+    )
+
+    company_id = current_company_id()
+    stmt = dialect_insert(Attendance).values([
+        {'company_id': company_id, **{key: r[key] for key in ('employee_id', 'month', 'year', 'period', 'present_days')}}
+        for r in rows
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['company_id', 'employee_id', 'period'],
+        set_={'present_days': stmt.excluded.present_days},
+    )
+    db.session.execute(stmt)
+
+    record_attendance_rows([
+        {'period': r['period'], 'present_days': r['present_days'],
+         'previous_days': previous.get((r['employee_id'], r['period']))}
+        for r in rows
+    ])
+    updated = sum(1 for key in keys if key in previous)
+    return len(rows) - updated, updated
+
+def _apply_chunk(chunk, result):
+    staged = []
+    boundary = archived_through()
+    for row_number, record in chunk:
+        values, errors = _parse_row(record)
+        if not errors and boundary is not None and values['period'] <= boundary:
+            errors = ['financial year is closed']
+        if errors:
+            result.reject(row_number, errors)
+        else:
+            staged.append((row_number, values))
+
+    known = _resolve_employees(staged)
+    # One row per (employee, period); a later row in the chunk wins
+    rows = {}
+    for row_number, values in staged:
+        if values['employee_id'] not in known:
+            result.reject(row_number, ['employee not found'])
+            continue
+        key = (values['employee_id'], values['period'])
+        if key in rows:
+            result.reject(rows[key][0], [f'superseded by row {row_number}'])
+        rows[key] = (row_number, values)
+
+    inserted, updated = upsert_attendance([values for _, values in rows.values()])
+    result.inserted += inserted
+    result.updated += updated
+
+def ingest_attendance(fileobj, filename, chunk_size=CHUNK_SIZE):
+    """Apply an attendance CSV/XLSX file in one transaction and return an AttendanceResult.
+
+    Columns: employee_id or email, month, year, present_days. Invalid rows
+    are skipped and reported; if anything else fails nothing is written.
+    Raises ValueError if the file itself cannot be read.
+    """
+    result = AttendanceResult()
+    try:
+        for chunk in chunked(read_rows(fileobj, filename, required=REQUIRED), chunk_size):
+            _apply_chunk(chunk, result)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
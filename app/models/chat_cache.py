@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from itertools import chain
+from sqlalchemy import event, literal, select, true
+from sqlalchemy.orm import Session
+import re
+import threading
+import time
+from app.models.model import (
+    Employee, Payroll, Attendance, PayrollArchive, AttendanceArchive, Company, DataVersion, dialect_insert, db
+)
+from app.tenancy import current_company_id
+
+# Answers from the chat assistant, reused for repeat questions. Entries are
+# keyed by the normalized question, the asker's company and role and the
+# company's data version, a counter in the database that every commit writing
+# the company's business data bumps, so an answer is never served once the
+# rows behind it have changed in any process. Each company has its own
+# counter; writes made outside any company's scope bump them all.
+
+# Models whose writes change the data version
+VERSIONED_MODELS = (Employee, Payroll, Attendance, PayrollArchive, AttendanceArchive, Company)
+
+def normalize_question(question):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r'\s+', ' ', question.lower()).strip().rstrip('?!. ')
+
+def data_version():
+    """Data version of the current company."""
+    return db.session.execute(
+        select(DataVersion.version).filter(DataVersion.company_id == current_company_id())
+    ).scalar() or 0
+
+class AnswerCache:
+    """Thread-safe LRU of chat answers with a time-to-live and hit/miss counters."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(question, company_id, role, version):
+        return (normalize_question(question), company_id, role, version)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, answer):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_answer_cache(config):
+    """Process-wide AnswerCache sized from the app ``config``."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache(config['CHAT_CACHE_SIZE'], config['CHAT_CACHE_TTL'])
+        return _cache
+
+# --- Data version -----------------------------------------------------------
+
+def _touches_versioned(objects):
+    return any(isinstance(obj, VERSIONED_MODELS) for obj in objects)
+
+@event.listens_for(Session, 'after_flush')
+def _flag_flush(session, flush_context):
+    if _touches_versioned(chain(session.new, session.dirty, session.deleted)):
+        session.info['data_changed'] = True
+
+@event.listens_for(Session, 'do_orm_execute')
+def _flag_bulk(orm_execute_state):
+    # Bulk INSERT / UPDATE / DELETE statements bypass the unit of work
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or issubclass(mapper.class_, VERSIONED_MODELS):
+        orm_execute_state.session.info['data_changed'] = True
+
+@event.listens_for(Session, 'before_commit')
+def _bump_version(session):
+    # Changes still pending here are flushed by the commit itself
+    pending = _touches_versioned(chain(session.new, session.dirty, session.deleted))
+    if session.info.pop('data_changed', False) or pending:
+        company_id = current_company_id()
+        if company_id is not None:
+            stmt = dialect_insert(DataVersion).values(company_id=company_id, version=1)
+        else:
+            # WHERE true keeps SQLite from reading ON CONFLICT as a join clause
+            stmt = dialect_insert(DataVersion).from_select(
+                ['company_id', 'version'], select(Company.id, literal(1)).where(true())
+            )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['company_id'], set_={'version': DataVersion.__table__.c.version + 1}
+        )
+        # Executed on the connection so it stays in this transaction without
+        # re-entering the ORM events above
+        session.connection().execute(stmt)
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _clear_flag(session):
+    # The commit's own flush runs after before_commit and sets the flag again
+    session.info.pop('data_changed', None)
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+
+import httpx
+from app.metrics import CHAT_COMPLETION
+
+# Try importing SarvamAI, handle if not present
+try:
+    from sarvamai import SarvamAI
+    from sarvamai.environment import SarvamAIEnvironment
+except ImportError:
+    SarvamAI = None
+
+# One SarvamAI client per process, sharing a pooled httpx connection so chat
+# requests reuse warm TLS connections instead of opening a new one each time.
+# The base URL is configurable so the assistant can be pointed at a local stub
+# of the completion API.
+
+CHAT_MODEL = 'sarvam-m'
+
+COMPLETIONS_PATH = '/v1/chat/completions'
+
+class ChatTimeout(Exception):
+    """The completion did not finish within the configured time."""
+
+_client = None
+_http = None
+_lock = threading.Lock()
+
+def get_client(config):
+    """Process-wide SarvamAI client built from the app ``config``."""
+    global _client, _http
+    with _lock:
+        if _client is None:
+            _http = httpx.Client(
+                timeout=httpx.Timeout(config['CHAT_TIMEOUT'], connect=config['CHAT_CONNECT_TIMEOUT']),
+                limits=httpx.Limits(
+                    max_connections=config['CHAT_MAX_CONNECTIONS'],
+                    max_keepalive_connections=config['CHAT_MAX_CONNECTIONS'],
+                ),
+            )
+            base_url = config['SARVAM_BASE_URL'].rstrip('/')
+            _client = SarvamAI(
+                api_subscription_key=config['SARVAM_API_KEY'],
+                environment=SarvamAIEnvironment(
+                    base=base_url, production=base_url.replace('http', 'ws', 1)
+                ),
+                httpx_client=_http,
+            )
+        return _client
+
+def complete(config, messages):
+    """Full reply text for ``messages``."""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        response = get_client(config).chat.completions(messages=messages)
+        outcome = 'ok'
+        return response.choices[0].message.content
+    except httpx.TimeoutException:
+        outcome = 'timeout'
+        raise
+    finally:
+        CHAT_COMPLETION.observe(time.perf_counter() - start, mode='complete', outcome=outcome)
+
+def stream_completion(config, messages):
+    """Yield reply text fragments for ``messages`` as the API produces them.
+
+    The completion endpoint streams server-sent events when ``stream`` is
+    set; the SDK only parses whole responses, so the events are read here
+    over the same pooled connection, with the URL and key from ``config``.
+    Raises ChatTimeout once the reply takes longer than CHAT_TIMEOUT
+    overall. Closing the generator (e.g. when the browser disconnects)
+    closes the upstream response.
+    """
+    # Sets up the shared connection pool on first use
+    get_client(config)
+    deadline = time.monotonic() + config['CHAT_TIMEOUT']
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield from _stream_events(config, messages, deadline)
+        outcome = 'ok'
+    except (ChatTimeout, httpx.TimeoutException):
+        outcome = 'timeout'
+        raise
+    except GeneratorExit:
+        outcome = 'cancelled'
+        raise
+    finally:
+        CHAT_COMPLETION.observe(time.perf_counter() - start, mode='stream', outcome=outcome)
+
+def _stream_events(config, messages, deadline):
+    with _http.stream(
+        'POST',
+        config['SARVAM_BASE_URL'].rstrip('/') + COMPLETIONS_PATH,
+        headers={'api-subscription-key': config['SARVAM_API_KEY'] or ''},
+        json={'messages': messages, 'model': CHAT_MODEL, 'stream': True},
+    ) as response:
+        if response.status_code >= 400:
+            response.read()
+            raise RuntimeError(f"Chat API error {response.status_code}: {response.text}")
+
+        for line in response.iter_lines():
+            if time.monotonic() > deadline:
+                raise ChatTimeout('The assistant took too long to respond')
+            if not line.startswith('data:'):
+                continue
+            payload = line[len('data:'):].strip()
+            if payload == '[DONE]':
+                return
+            chunk = json.loads(payload)
+            for choice in chunk.get('choices') or []:
+                text = (choice.get('delta') or {}).get('content')
+                if text:
+                    yield text
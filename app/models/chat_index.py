@@ -0,0 +1,229 @@
+from collections import Counter, defaultdict
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+import calendar
+import heapq
+import math
+import re
+import threading
+import time
+from app.models.model import (
+    User, Employee, Payroll, Attendance, PayrollArchive, AttendanceArchive, Company,
+    PeriodSummary, DepartmentSummary, db
+)
+from app.models.archive import split_periods
+from app.tenancy import current_company, current_company_id, is_scoped
+
+# In-process BM25 index over the payroll database for the chat assistant.
+# Instead of pasting every user, employee and payroll into the prompt, the
+# question is matched against one document per record and only the best
+# matches (within a character budget) are sent to the model.
+
+K1 = 1.5
+B = 0.75
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'by', 'can', 'do', 'does', 'for', 'from',
+    'give', 'has', 'have', 'how', 'i', 'in', 'is', 'it', 'me', 'much', 'my', 'of',
+    'on', 'or', 'please', 'show', 'tell', 'the', 'to', 'was', 'what', 'when',
+    'which', 'who', 'with',
+}
+
+# Models whose writes make the index stale
+TRACKED_MODELS = (
+    User, Employee, Payroll, Attendance, PayrollArchive, AttendanceArchive, Company,
+    PeriodSummary, DepartmentSummary,
+)
+
+def tokenize(text):
+    return [t for t in re.findall(r'[a-z0-9]+', text.lower()) if t not in STOPWORDS]
+
+def _period_label(period):
+    return f"{calendar.month_name[period % 100]} {period // 100}"
+
+class RetrievalIndex:
+    """Inverted index with BM25 ranking over ``(section, text)`` documents."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.postings = defaultdict(list)
+        self.lengths = []
+        for doc_id, (_, text) in enumerate(documents):
+            tokens = tokenize(text)
+            self.lengths.append(len(tokens))
+            for token, tf in Counter(tokens).items():
+                self.postings[token].append((doc_id, tf))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 1.0
+        self.built_at = time.monotonic()
+
+    def search(self, query, k):
+        """``(doc_id, score)`` for the ``k`` best matches, best first."""
+        n = len(self.documents)
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                length_norm = 1 - B + B * self.lengths[doc_id] / self.avg_length
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + K1 * length_norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+def _documents(recent_periods):
+    """One ``(section, text)`` document per record worth retrieving."""
+    docs = []
+
+    # Users are not a tenant table, so they are filtered here
+    for u in db.session.execute(
+        select(User.name, User.role, User.email).filter(User.company_id == current_company_id())
+    ):
+        docs.append(('SYSTEM USERS', f"- {u.name} ({u.role}, {u.email})"))
+
+    for e in db.session.execute(select(
+        Employee.id, Employee.name, Employee.designation, Employee.department, Employee.basic_salary,
+        Employee.joining_date, Employee.pan, Employee.uan
+    ).execution_options(yield_per=1000)):
+        docs.append(('EMPLOYEE DIRECTORY', (
+            f"- {e.name} (ID: {e.id}, {e.designation}, Dept: {e.department}, "
+            f"Salary: {e.basic_salary}, Joined: {e.joining_date}, "
+            f"PAN: {e.pan}, UAN: {e.uan})"
+        )))
+
+    periods = [p for p, in db.session.execute(
+        select(PeriodSummary.period).order_by(PeriodSummary.period.desc()).limit(recent_periods)
+    )]
+    # Recent periods may already sit in the archive tables after a year close
+    for PayrollTable, table_periods in split_periods(Payroll, periods):
+        for p in db.session.execute(
+            select(PayrollTable.month, PayrollTable.year, PayrollTable.employee_id, Employee.name,
+                   PayrollTable.net_salary, PayrollTable.attendance_days)
+            .join(Employee, PayrollTable.employee_id == Employee.id)
+            .filter(PayrollTable.period.in_(table_periods))
+            .execution_options(yield_per=1000)
+        ):
+            docs.append(('PAYROLL RECORDS', (
+                f"- {p.month} {p.year}: {p.name} (Employee ID: {p.employee_id}, "
+                f"Net: {p.net_salary}, Attendance: {p.attendance_days} days)"
+            )))
+
+    for AttendanceTable, table_periods in split_periods(Attendance, periods):
+        for a in db.session.execute(
+            select(AttendanceTable.month, AttendanceTable.year, AttendanceTable.employee_id, Employee.name,
+                   AttendanceTable.present_days)
+            .join(Employee, AttendanceTable.employee_id == Employee.id)
+            .filter(AttendanceTable.period.in_(table_periods))
+            .execution_options(yield_per=1000)
+        ):
+            docs.append(('ATTENDANCE RECORDS', (
+                f"- {a.month} {a.year}: {a.name} (Employee ID: {a.employee_id}) "
+                f"attendance present {a.present_days} days"
+            )))
+
+    # Pre-aggregated figures answer "how many" / "total" questions that no
+    # single record can
+    for s in PeriodSummary.query.order_by(PeriodSummary.period.desc()):
+        avg = s.payroll_attendance_days / s.payroll_count if s.payroll_count else 0
+        docs.append(('PAYROLL SUMMARY', (
+            f"- {_period_label(s.period)} payroll total: {s.payroll_count} payslips generated, "
+            f"total net salary {s.total_net:.2f}, average attendance {avg:.1f} days"
+        )))
+    for d in DepartmentSummary.query:
+        if d.headcount:
+            docs.append(('HEADCOUNT', (
+                f"- Department {d.department or 'Unassigned'}: {d.headcount} employees, "
+                f"{d.compliance_issues} with missing compliance details"
+            )))
+
+    return docs
+
+def _company_info():
+    company = current_company()
+    if not company:
+        return "Not Configured"
+    return (
+        f"Name: {company.name}, Address: {company.address}, "
+        f"GST: {company.gst_number}, PAN: {company.pan_number}, "
+        f"PF Code: {company.pf_code}, ESI Code: {company.esi_code}, "
+        f"PT Circle: {company.pt_circle}"
+    )
+
+# Per-process index for each company; rebuilt lazily after a write or once
+# the TTL expires (writes made by other worker processes are only seen via
+# the TTL).
+_indexes = {}
+_lock = threading.Lock()
+
+def mark_stale():
+    """Drop the current company's index (every index when unscoped)."""
+    with _lock:
+        if is_scoped():
+            _indexes.pop(current_company_id(), None)
+        else:
+            _indexes.clear()
+
+def get_index(ttl, recent_periods):
+    """Index of the current company's records."""
+    company_id = current_company_id()
+    with _lock:
+        index = _indexes.get(company_id)
+        if index is None or time.monotonic() - index.built_at > ttl:
+            index = _indexes[company_id] = RetrievalIndex(_documents(recent_periods))
+        # Indexes of companies nobody asked about within the TTL are dropped
+        now = time.monotonic()
+        for stale in [c for c, i in _indexes.items() if now - i.built_at > ttl]:
+            del _indexes[stale]
+        return index
+
+def build_context(question, top_k, budget, ttl, recent_periods):
+    """Prompt context for ``question``: company details plus the top matches.
+
+    Matches are added best first until ``top_k`` documents or ``budget``
+    characters are used, then grouped under their section headings.
+    """
+    index = get_index(ttl, recent_periods)
+    company_info = _company_info()
+    used = len(company_info)
+
+    sections = defaultdict(list)
+    for doc_id, _ in index.search(question, top_k):
+        section, text = index.documents[doc_id]
+        if used + len(text) > budget:
+            break
+        sections[section].append(text)
+        used += len(text) + 1
+
+    parts = [f"=== COMPANY DETAILS ===\n{company_info}"]
+    for section, lines in sections.items():
+        parts.append(f"=== {section} ===\n" + "\n".join(lines))
+    if not sections:
+        parts.append("=== RELEVANT RECORDS ===\nNo matching records found.")
+    return "\n\n".join(parts)
+
+# --- Invalidation -----------------------------------------------------------
+
+def _touches_tracked(objects):
+    return any(isinstance(obj, TRACKED_MODELS) for obj in objects)
+
+@event.listens_for(Session, 'after_flush')
+def _flag_flush(session, flush_context):
+    if _touches_tracked(session.new) or _touches_tracked(session.dirty) or _touches_tracked(session.deleted):
+        session.info['chat_index_stale'] = True
+
+@event.listens_for(Session, 'do_orm_execute')
+def _flag_bulk(orm_execute_state):
+    # Bulk INSERT / UPDATE / DELETE statements bypass the unit of work
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or issubclass(mapper.class_, TRACKED_MODELS):
+        orm_execute_state.session.info['chat_index_stale'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    if session.info.pop('chat_index_stale', False):
+        mark_stale()
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('chat_index_stale', None)
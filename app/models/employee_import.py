@@ -0,0 +1,220 @@
+from datetime import datetime, date
+from sqlalchemy import insert
+import csv
+import io
+import re
+from app.models.model import Employee, db
+from app.models.pdf_stream import chunked
+from app.models.rollup import record_employees
+
+# Bulk onboarding from a CSV or XLSX sheet. The file is parsed row by row and
+# handled in fixed-size batches (validate, check emails against the database,
+# bulk INSERT, commit), so memory stays flat however many rows it has.
+
+BATCH_SIZE = 500
+
+# Per-row problems kept in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+COLUMNS = ['name', 'email', 'designation', 'department', 'joining_date', 'basic_salary',
+           'pan', 'uan', 'pf_number', 'esi_number']
+REQUIRED = ['name', 'email', 'designation', 'joining_date', 'basic_salary']
+
+# Header spellings accepted besides the column names (those of the add form)
+ALIASES = {
+    'salary': 'basic_salary',
+    'join_date': 'joining_date',
+    'date_of_joining': 'joining_date',
+    'pan_number': 'pan',
+    'uan_number': 'uan',
+    'pf_no': 'pf_number',
+    'esi_no': 'esi_number',
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+PAN_RE = re.compile(r'^[A-Z]{5}[0-9]{4}[A-Z]$')
+UAN_RE = re.compile(r'^[0-9]{12}$')
+
+class ImportResult:
+    """Counts and per-row errors of one import."""
+
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, row_number, email, messages):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'email': email, 'errors': messages})
+
+    def to_dict(self):
+        return {
+            'imported': self.imported,
+            'rejected': self.rejected,
+            'errors': sorted(self.errors, key=lambda e: e['row']),
+            'errors_truncated': self.rejected > len(self.errors),
+        }
+
+def _column(header):
+    key = re.sub(r'[^a-z0-9]+', '_', str(header or '').strip().lower()).strip('_')
+    return ALIASES.get(key, key)
+
+def _csv_rows(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        yield [_column(h) for h in header]
+        yield from reader
+    finally:
+        # Leave the underlying upload open for its owner
+        text.detach()
+
+def _xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Reading .xlsx files requires the openpyxl package')
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield [_column(h) for h in header]
+        yield from rows
+    finally:
+        workbook.close()
+
+def read_rows(fileobj, filename, required=REQUIRED):
+    """Yield ``(row_number, record)`` dicts from a CSV or XLSX upload.
+
+    Row numbers count the header as row 1, matching what a spreadsheet shows.
+    Raises ValueError if a ``required`` column is missing from the header.
+    """
+    if filename.lower().endswith('.xlsx'):
+        rows = _xlsx_rows(fileobj)
+    elif filename.lower().endswith('.csv'):
+        rows = _csv_rows(fileobj)
+    else:
+        raise ValueError('Upload a .csv or .xlsx file')
+
+    header = next(rows, None)
+    if header is None:
+        raise ValueError('The file is empty')
+    missing = [c for c in required if c not in header]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    for row_number, values in enumerate(rows, 2):
+        if values is None or all(v is None or str(v).strip() == '' for v in values):
+            continue
+        yield row_number, dict(zip(header, values))
+
+def cell_text(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheet cells hold numeric ids such as the UAN as floats
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError
+
+def validate_row(record):
+    """``(employee_values, errors)`` for one parsed record."""
+    values = {column: cell_text(record.get(column)) for column in COLUMNS}
+    errors = [f'{column} is required' for column in REQUIRED if values[column] is None]
+
+    if values['email'] and not EMAIL_RE.match(values['email']):
+        errors.append('email is not valid')
+
+    if values['joining_date']:
+        raw = record.get('joining_date')
+        try:
+            values['joining_date'] = _parse_date(raw if isinstance(raw, date) else values['joining_date'])
+        except ValueError:
+            errors.append('joining_date must be a date (YYYY-MM-DD or DD-MM-YYYY)')
+
+    if values['basic_salary']:
+        try:
+            values['basic_salary'] = float(values['basic_salary'].replace(',', ''))
+            if values['basic_salary'] <= 0:
+                errors.append('basic_salary must be positive')
+        except ValueError:
+            errors.append('basic_salary must be a number')
+
+    if values['pan']:
+        values['pan'] = values['pan'].upper()
+        if not PAN_RE.match(values['pan']):
+            errors.append('pan must look like ABCDE1234F')
+    if values['uan'] and not UAN_RE.match(values['uan']):
+        errors.append('uan must be 12 digits')
+
+    return values, errors
+
+def _import_batch(batch, result, dry_run):
+    valid = []
+    seen = set()
+    for row_number, record in batch:
+        values, errors = validate_row(record)
+        email = values['email']
+        if email and email in seen:
+            errors.append('email appears more than once in the file')
+        if errors:
+            result.reject(row_number, email, errors)
+            continue
+        seen.add(email)
+        valid.append((row_number, values))
+
+    # Rows committed by earlier batches are in the table, so this also
+    # catches duplicates across batches without remembering every email
+    existing = set()
+    if seen:
+        existing = {email for email, in db.session.query(Employee.email).filter(Employee.email.in_(seen))}
+
+    rows = []
+    for row_number, values in valid:
+        if values['email'] in existing:
+            result.reject(row_number, values['email'], ['an employee with this email already exists'])
+        else:
+            rows.append(values)
+
+    if rows and not dry_run:
+        db.session.execute(insert(Employee), rows)
+        record_employees(rows)
+        db.session.commit()
+    result.imported += len(rows)
+
+def import_employees(fileobj, filename, batch_size=BATCH_SIZE, dry_run=False):
+    """Import employees from an uploaded CSV/XLSX file and return an ImportResult.
+
+    Valid rows are inserted and committed ``batch_size`` at a time; invalid
+    ones are skipped and reported by row number. With ``dry_run`` nothing is
+    written (and duplicates between batches go unnoticed). Raises ValueError
+    if the file itself cannot be read.
+    """
+    result = ImportResult()
+    try:
+        for batch in chunked(read_rows(fileobj, filename), batch_size):
+            _import_batch(batch, result, dry_run)
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
@@ -0,0 +1,166 @@
+import csv
+import io
+from openpyxl import Workbook
+from app.models.pdf_stream import chunked, spooled_output
+from app.models.payroll_calc import TOTAL_WORKING_DAYS
+from app.models.reports import employee_components, paid_components, has_payrolls
+from app.models.report_templates import period_label
+
+# Spreadsheet and statutory upload exports of the muster roll and PF / ESI
+# data. Records come one at a time from employee_components (a server-side
+# cursor feeding the payroll kernel a batch at a time). The EPFO and ESIC
+# upload files are filed as returns, so they only use the payrolls already
+# generated (paid_components), never estimated figures, and are refused for
+# a month with no payroll. Text formats are streamed to the client in chunks
+# and XLSX is written by openpyxl's write-only mode into a spooled file, so
+# memory stays flat for any roster.
+
+# Rows per chunk written to a streamed text response
+ROWS_PER_WRITE = 500
+
+# EPS and EDLI wages are capped at this monthly amount
+EPS_WAGE_CEILING = 15000
+EPS_RATE = 0.0833
+
+# EPFO ECR 2.0 text file: one line per member, fields joined by this
+ECR_SEPARATOR = '#~#'
+
+EXPORT_FORMATS = {
+    'muster': ('csv', 'xlsx'),
+    'pf_esi': ('csv', 'xlsx', 'ecr', 'esic'),
+}
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'ecr': 'text/plain',
+    'esic': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Upload files filed with EPFO / ESIC, built from generated payrolls only
+STATUTORY_FORMATS = ('ecr', 'esic')
+
+EXPORT_FILENAMES = {
+    ('muster', 'csv'): "MusterRoll_{period}.csv",
+    ('muster', 'xlsx'): "MusterRoll_{period}.xlsx",
+    ('pf_esi', 'csv'): "PF_ESI_{period}.csv",
+    ('pf_esi', 'xlsx'): "PF_ESI_{period}.xlsx",
+    ('pf_esi', 'ecr'): "ECR_{period}.txt",
+    ('pf_esi', 'esic'): "ESIC_MC_{period}.xlsx",
+}
+
+MUSTER_COLUMNS = [
+    "Sl", "Employee ID", "Employee Name", "Days Present", "Gross (Rs.)", "Deduction (Rs.)",
+    "Net Pay (Rs.)", "PF (Rs.)", "ESI (Rs.)",
+]
+
+PF_ESI_COLUMNS = [
+    "Employee ID", "Employee Name", "UAN", "ESI Number", "Employee PF (Rs.)", "Employer PF (Rs.)",
+    "Total PF (Rs.)", "Employee ESI (Rs.)", "Employer ESI (Rs.)", "Total ESI (Rs.)",
+]
+
+# Column order of the ESIC monthly contribution upload template
+ESIC_COLUMNS = [
+    "IP Number", "IP Name", "No of Days for which wages paid/payable during the month",
+    "Total Monthly Wages", "Reason Code for Zero workings days", "Last Working Day",
+]
+
+def muster_records(period):
+    for sl, (emp, days, comp) in enumerate(employee_components(period), 1):
+        yield [sl, emp.id, emp.name, days, comp['gross_salary'], comp['total_deductions'],
+               comp['net_salary'], comp['pf'], comp['esi']]
+
+def pf_esi_records(period):
+    for emp, _, comp in employee_components(period):
+        pf, employer_pf = comp['pf'], comp['employer_pf']
+        esi, employer_esi = comp['esi'], comp['employer_esi']
+        yield [emp.id, emp.name, emp.uan, emp.esi_number, pf, employer_pf, round(pf + employer_pf, 2),
+               esi, employer_esi, round(esi + employer_esi, 2)]
+
+def ecr_lines(period):
+    """Member lines of the EPFO ECR 2.0 file from the payrolls generated for
+    ``period``; employees without a UAN are left out.
+
+    Fields: UAN, name, gross wages, EPF / EPS / EDLI wages, EPF, EPS and
+    EPF-EPS difference contributions, NCP days and refund of advances, all
+    in whole rupees / days.
+    """
+    for emp, days, comp in paid_components(period):
+        if not emp.uan:
+            continue
+        epf_wages = round(comp['earned_basic'])
+        eps_wages = min(epf_wages, EPS_WAGE_CEILING)
+        epf = round(comp['pf'])
+        eps = round(eps_wages * EPS_RATE)
+        ncp_days = max(0, round(TOTAL_WORKING_DAYS - days))
+        yield ECR_SEPARATOR.join(str(value) for value in (
+            emp.uan, emp.name, round(comp['gross_salary']), epf_wages, eps_wages, eps_wages,
+            epf, eps, epf - eps, ncp_days, 0,
+        ))
+
+def esic_records(period):
+    """Rows of the ESIC monthly contribution upload; employees without an IP number are left out."""
+    for emp, days, comp in paid_components(period):
+        if not emp.esi_number:
+            continue
+        days = round(days)
+        # Reason code 0 ("without reason") is only asked for when no days were worked
+        yield [emp.esi_number, emp.name, days, round(comp['gross_salary']), 0 if days == 0 else None, None]
+
+def csv_chunks(columns, records):
+    """Yield CSV text for ``columns`` and ``records``, ROWS_PER_WRITE rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for chunk in chunked(records, ROWS_PER_WRITE):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+def text_chunks(lines):
+    for chunk in chunked(lines, ROWS_PER_WRITE):
+        yield ''.join(line + '\r\n' for line in chunk)
+
+def xlsx_file(columns, records, title):
+    """Write ``records`` to a one-sheet workbook; returns the file, rewound."""
+    # Write-only workbooks keep rows in a temp file rather than in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(columns)
+    for record in records:
+        sheet.append(record)
+    output = spooled_output()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+def build_export(report_type, fmt, period):
+    """``(body, mimetype, filename)`` for one export of ``period``.
+
+    ``body`` is a rewound file for XLSX formats and an iterator of text
+    chunks for the rest; the caller streams it. Raises ValueError for an
+    unknown report type or format, or for an upload file of a month whose
+    payroll has not been generated.
+    """
+    if fmt not in EXPORT_FORMATS.get(report_type, ()):
+        raise ValueError(f'Invalid export: {report_type} as {fmt}')
+    if fmt in STATUTORY_FORMATS and not has_payrolls(period):
+        raise ValueError(f'No payroll has been generated for {period_label(period)}; close the month first')
+
+    if fmt == 'ecr':
+        body = text_chunks(ecr_lines(period))
+    elif fmt == 'esic':
+        body = xlsx_file(ESIC_COLUMNS, esic_records(period), 'Monthly Contribution')
+    else:
+        columns, records, title = {
+            'muster': (MUSTER_COLUMNS, muster_records, 'Muster Roll'),
+            'pf_esi': (PF_ESI_COLUMNS, pf_esi_records, 'PF & ESI'),
+        }[report_type]
+        if fmt == 'csv':
+            body = csv_chunks(columns, records(period))
+        else:
+            body = xlsx_file(columns, records(period), title)
+
+    return body, MIMETYPES[fmt], EXPORT_FILENAMES[report_type, fmt].format(period=period)
@@ -1,8 +1,54 @@
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import declared_attr
 from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import date
+import calendar
 
 db = SQLAlchemy()
 
+MONTHS = list(calendar.month_name)[1:]
+
+def period_key(month, year):
+    """Numeric pay-period key (yyyymm) for a month name and year."""
+    return int(year) * 100 + MONTHS.index(month) + 1
+
+def current_period():
+    """Pay period (yyyymm) of the current month."""
+    today = date.today()
+    return today.year * 100 + today.month
+
+def financial_year(period):
+    """Start year of the financial year (April to March) containing ``period``."""
+    year, month = divmod(period, 100)
+    return year if month >= 4 else year - 1
+
+def dialect_insert(model):
+    """INSERT for ``model`` with ON CONFLICT support on the bound database."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+def _default_period(context):
+    params = context.get_current_parameters()
+    return period_key(params['month'], params['year'])
+
+def _current_company():
+    from app.tenancy import current_company_id
+    return current_company_id()
+
+class TenantMixin:
+    """Business data owned by one company.
+
+    app.tenancy filters queries on these tables to the current company and
+    new rows default to it.
+    """
+
+    @declared_attr
+    def company_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, default=_current_company)
+
 class User(db.Model):
     __tablename__ = 'users'
 
@@ -11,6 +57,8 @@ class User(db.Model):
     role = db.Column(db.String(50), nullable=False, server_default='user')
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255))
+    # None until an admin sets up their company or an employee is linked to one
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True, index=True)
 
     @property
     def password(self):
@@ -18,17 +66,18 @@ class User(db.Model):
 
     @password.setter
     def password(self, password):
-        self.password_hash = generate_password_hash(password)
+        method = current_app.config['PASSWORD_HASH_METHOD'] if has_app_context() else 'scrypt'
+        self.password_hash = generate_password_hash(password, method=method)
 
     def verify_password(self, password):
         return check_password_hash(self.password_hash, password)
 
-class Employee(db.Model):
+class Employee(TenantMixin, db.Model):
     __tablename__ = 'employees'
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
+    email = db.Column(db.String(120), nullable=False)
     designation = db.Column(db.String(100), nullable=False)
     joining_date = db.Column(db.Date, nullable=False)
     basic_salary = db.Column(db.Float, nullable=False)
@@ -38,19 +87,43 @@ class Employee(db.Model):
     esi_number = db.Column(db.String(20), nullable=True)
     department = db.Column(db.String(50), nullable=True)
 
-class Payroll(db.Model):
+    __table_args__ = (
+        db.Index('ux_employees_company_email', 'company_id', 'email', unique=True),
+        db.Index('ix_employees_company_id', 'company_id', 'id'),
+        db.Index('ix_employees_company_department', 'company_id', 'department', 'id'),
+    )
+
+class Payroll(TenantMixin, db.Model):
     __tablename__ = 'payrolls'
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
     month = db.Column(db.String(20), nullable=False)
     year = db.Column(db.Integer, nullable=False)
+    period = db.Column(db.Integer, nullable=False, default=_default_period)
     net_salary = db.Column(db.Float, nullable=False)
     attendance_days = db.Column(db.Float, default=0.0)
+    # Payslip components as computed when the payroll was generated, so
+    # history stays correct after the employee's basic salary changes
+    gross_salary = db.Column(db.Float, nullable=False)
+    earned_basic = db.Column(db.Float, nullable=False)
+    pf = db.Column(db.Float, nullable=False)
+    esi = db.Column(db.Float, nullable=False)
+    employer_pf = db.Column(db.Float, nullable=False)
+    employer_esi = db.Column(db.Float, nullable=False)
+    total_deductions = db.Column(db.Float, nullable=False)
     generated_at = db.Column(db.DateTime, default=db.func.now())
 
     employee = db.relationship('Employee', backref=db.backref('payrolls', lazy=True))
 
+    # Rows of closed financial years (PayrollArchive) are read-only
+    archived = False
+
+    __table_args__ = (
+        db.Index('ux_payrolls_company_employee_period', 'company_id', 'employee_id', 'period', unique=True),
+        db.Index('ix_payrolls_company_period', 'company_id', 'period'),
+    )
+
 class Company(db.Model):
     __tablename__ = 'companies'
 
@@ -63,14 +136,132 @@ class Company(db.Model):
     pf_code = db.Column(db.String(20))
     esi_code = db.Column(db.String(20))
     pt_circle = db.Column(db.String(50))
+    # Last pay period (yyyymm) of the closed financial years moved to the
+    # archive tables; None while nothing is archived
+    archived_through = db.Column(db.Integer, nullable=True)
 
-class Attendance(db.Model):
+class Attendance(TenantMixin, db.Model):
     __tablename__ = 'attendance'
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
     month = db.Column(db.String(20), nullable=False)
     year = db.Column(db.Integer, nullable=False)
+    period = db.Column(db.Integer, nullable=False, default=_default_period)
     present_days = db.Column(db.Float, nullable=False, default=0.0)
     
     employee = db.relationship('Employee', backref=db.backref('attendance_records', lazy=True))
+
+    __table_args__ = (
+        db.Index('ux_attendance_company_employee_period', 'company_id', 'employee_id', 'period', unique=True),
+        db.Index('ix_attendance_company_period', 'company_id', 'period'),
+    )
+
+class PayrollArchive(TenantMixin, db.Model):
+    """Payrolls of closed financial years, moved out of ``payrolls``.
+
+    Rows get ids of their own: SQLite reuses the ids of rows deleted from
+    ``payrolls``, so the original id (kept in ``source_id``) is not unique
+    across closes.
+    """
+    __tablename__ = 'payrolls_archive'
+
+    id = db.Column(db.Integer, primary_key=True)
+    source_id = db.Column(db.Integer, nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    month = db.Column(db.String(20), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    period = db.Column(db.Integer, nullable=False)
+    net_salary = db.Column(db.Float, nullable=False)
+    attendance_days = db.Column(db.Float, default=0.0)
+    gross_salary = db.Column(db.Float, nullable=False)
+    earned_basic = db.Column(db.Float, nullable=False)
+    pf = db.Column(db.Float, nullable=False)
+    esi = db.Column(db.Float, nullable=False)
+    employer_pf = db.Column(db.Float, nullable=False)
+    employer_esi = db.Column(db.Float, nullable=False)
+    total_deductions = db.Column(db.Float, nullable=False)
+    generated_at = db.Column(db.DateTime)
+
+    employee = db.relationship('Employee')
+
+    archived = True
+
+    __table_args__ = (
+        db.Index('ix_payrolls_archive_company_employee_period', 'company_id', 'employee_id', 'period'),
+        db.Index('ix_payrolls_archive_company_period', 'company_id', 'period'),
+    )
+
+class AttendanceArchive(TenantMixin, db.Model):
+    """Attendance of closed financial years, moved out of ``attendance``; ids as for PayrollArchive."""
+    __tablename__ = 'attendance_archive'
+
+    id = db.Column(db.Integer, primary_key=True)
+    source_id = db.Column(db.Integer, nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
+    month = db.Column(db.String(20), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    period = db.Column(db.Integer, nullable=False)
+    present_days = db.Column(db.Float, nullable=False, default=0.0)
+
+    employee = db.relationship('Employee')
+
+    __table_args__ = (
+        db.Index('ix_attendance_archive_company_employee_period', 'company_id', 'employee_id', 'period'),
+        db.Index('ix_attendance_archive_company_period', 'company_id', 'period'),
+    )
+
+class PeriodSummary(TenantMixin, db.Model):
+    """Pre-aggregated payroll and attendance figures for one pay period.
+
+    Maintained incrementally by app.models.rollup on every payroll and
+    attendance write; ``payroll_count`` is the number of employees paid.
+    """
+    __tablename__ = 'period_summaries'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), primary_key=True, default=_current_company)
+    period = db.Column(db.Integer, primary_key=True)
+    payroll_count = db.Column(db.Integer, nullable=False, default=0)
+    total_net = db.Column(db.Float, nullable=False, default=0.0)
+    payroll_attendance_days = db.Column(db.Float, nullable=False, default=0.0)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    present_days = db.Column(db.Float, nullable=False, default=0.0)
+
+class DepartmentSummary(TenantMixin, db.Model):
+    """Current headcount per department (``''`` for unassigned)."""
+    __tablename__ = 'department_summaries'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), primary_key=True, default=_current_company)
+    department = db.Column(db.String(50), primary_key=True)
+    headcount = db.Column(db.Integer, nullable=False, default=0)
+    compliance_issues = db.Column(db.Integer, nullable=False, default=0)
+
+class SalaryYearToDate(TenantMixin, db.Model):
+    """Running totals of one employee's payrolls in one financial year.
+
+    Maintained by app.models.rollup with every payroll written or deleted,
+    so Form 16 reads one row instead of summing the ledger. ``tds`` is the
+    estimate at payroll_calc.TDS_RATE; it is not deducted on the payslips.
+    """
+    __tablename__ = 'salary_ytd'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), primary_key=True, default=_current_company)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), primary_key=True)
+    # Start year, e.g. 2025 for April 2025 - March 2026
+    financial_year = db.Column(db.Integer, primary_key=True)
+    payroll_count = db.Column(db.Integer, nullable=False, default=0)
+    gross_salary = db.Column(db.Float, nullable=False, default=0.0)
+    total_deductions = db.Column(db.Float, nullable=False, default=0.0)
+    net_salary = db.Column(db.Float, nullable=False, default=0.0)
+    tds = db.Column(db.Float, nullable=False, default=0.0)
+
+class DataVersion(db.Model):
+    """Per-company counter bumped by every commit that writes the company's business data.
+
+    Maintained by app.models.chat_cache; caches key their entries on it so
+    a write in any process invalidates them.
+    """
+    __tablename__ = 'data_versions'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
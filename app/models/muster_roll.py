@@ -1,91 +1,81 @@
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
+from reportlab.platypus import Paragraph, Spacer
 from reportlab.lib.units import inch
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import HRFlowable
+from itertools import chain
+from app.models.model import current_period
+from app.models.pdf_stream import chunked, ROWS_PER_CHUNK
+from app.models.report_templates import (
+    document, title_block, table, cached_header, period_label, NORMAL, INFO_GRID, MUSTER_GRID, TOTALS_GRID
+)
 
-def generate_muster_roll(filename="Monthly_Muster_Roll_Feb_2026.pdf", employees=None, company=None):
-    if company is None:
-        company = {}
-
-    # Reduce margins to allow wider tables
-    doc = SimpleDocTemplate(filename, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
-    elements = []
+HEADERS = ["Sl", "Employee Name", "Days Present", "Gross (Rs.)", "Deduction (Rs.)", "Net Pay (Rs.)", "PF (Rs.)", "ESI (Rs.)"]
 
-    styles = getSampleStyleSheet()
-
-    # Title
-    title_style = styles["Heading1"]
-    elements.append(Paragraph("MUSTER ROLL - REGISTER OF WAGES", title_style))
-    elements.append(Spacer(1, 0.2 * inch))
-    elements.append(HRFlowable(width="100%"))
-    elements.append(Spacer(1, 0.2 * inch))
+def _header(company, month):
+    yield from title_block("MUSTER ROLL - REGISTER OF WAGES")
 
     # Company Info Table
     company_data = [
-        ["Organization:", company.get('name', "XYZ Pvt Ltd"), "Month:", "February 2026"],
-        ["Address:", Paragraph(company.get('address', "Delhi NCR"), styles["Normal"]), "PF Account:", company.get('pf_code', "DL/ABC/12345")],
+        ["Organization:", company.get('name', "XYZ Pvt Ltd"), "Month:", month],
+        ["Address:", Paragraph(company.get('address') or "Delhi NCR", NORMAL), "PF Account:", company.get('pf_code', "DL/ABC/12345")],
         ["ESI Code:", company.get('esi_code', "270000000000000001"), "PT Circle:", company.get('pt_circle', "Delhi")]
     ]
 
     # Increased width for address column (index 1) and adjusted others to fit page
-    company_table = Table(company_data, colWidths=[80, 230, 80, 120])
-    company_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.whitesmoke),
-    ]))
-
-    elements.append(company_table)
-    elements.append(Spacer(1, 0.3 * inch))
-
-    # Main Payroll Table
-    headers = ["Sl", "Employee Name", "Days Present", "Gross (Rs.)", "Deduction (Rs.)", "Net Pay (Rs.)", "PF (Rs.)", "ESI (Rs.)"]
-    payroll_data = [headers]
-
-    if employees:
-        for emp in employees:
-            payroll_data.append([
-                emp.get('sl', ''),
-                emp.get('name', ''),
-                emp.get('present', '0'),
-                emp.get('gross', '0'),
-                emp.get('deduction', '0'),
-                emp.get('net', '0'),
-                emp.get('pf', '0'),
-                emp.get('esi', '0')
-            ])
-    else:
-        payroll_data.append(["1", "Raj Kumar", "26", "18000", "500", "17080", "1800", "135"])
+    yield table(company_data, [80, 230, 80, 120], INFO_GRID)
+    yield Spacer(1, 0.3 * inch)
 
-    payroll_table = Table(payroll_data, repeatRows=1)
-    payroll_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('ALIGN', (2,1), (-1,-1), 'CENTER')
-    ]))
+def generate_muster_roll(filename, employees=None, company=None, rows_per_table=ROWS_PER_CHUNK, progress=None, period=None):
+    """Render the muster roll for ``period`` (yyyymm, default the current month)
+    to ``filename`` (a path or a writable file).
 
-    elements.append(payroll_table)
-    elements.append(Spacer(1, 0.3 * inch))
-
-    # Totals Section
-    # Simple static total for now, or calculate if needed
-    total_count = len(employees) if employees else 0
-    
-    totals_data = [
-        ["TOTAL", f"{total_count} Employees", "-", "-", "-", "-"]
-    ]
-
-    # Adjusted totals table widths to fit within new margins
-    totals_table = Table(totals_data, colWidths=[70, 90, 100, 100, 80, 80])
-    totals_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,0), (-1,-1), colors.whitesmoke),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER')
-    ]))
-
-    elements.append(totals_table)
-
-    doc.build(elements)
+    ``employees`` may be any iterable of row dicts, including a generator;
+    rows are consumed as the pages are laid out. ``progress`` is passed to
+    ReportLab's ``setProgressCallBack``.
+    """
+    if company is None:
+        company = {}
+    period = period or current_period()
 
-    print("✅ Muster Roll PDF Generated Successfully!")
\ No newline at end of file
+    # Reduce margins to allow wider tables
+    doc = document(filename, 'wide', progress=progress)
+    elements = cached_header('muster', company, _header, period_label(period))
+
+    # Main Payroll Table, emitted one page-sized chunk at a time so employee
+    # rows can come straight from a generator / server-side cursor
+    def payroll_tables():
+        total_count = 0
+        rows = employees if employees else [
+            {'sl': "1", 'name': "Raj Kumar", 'present': "26", 'gross': "18000", 'deduction': "500",
+             'net': "17080", 'pf': "1800", 'esi': "135"}
+        ]
+        for chunk in chunked(rows, rows_per_table):
+            payroll_data = [HEADERS]
+            for emp in chunk:
+                payroll_data.append([
+                    emp.get('sl', ''),
+                    emp.get('name', ''),
+                    emp.get('present', '0'),
+                    emp.get('gross', '0'),
+                    emp.get('deduction', '0'),
+                    emp.get('net', '0'),
+                    emp.get('pf', '0'),
+                    emp.get('esi', '0')
+                ])
+            if employees:
+                total_count += len(chunk)
+
+            # Fixed widths keep the columns aligned from one chunk to the next
+            yield table(payroll_data, [25, 110, 70, 65, 80, 70, 55, 55], MUSTER_GRID, repeatRows=1)
+
+        yield Spacer(1, 0.3 * inch)
+
+        # Totals Section
+        totals_data = [
+            ["TOTAL", f"{total_count} Employees", "-", "-", "-", "-"]
+        ]
+
+        # Adjusted totals table widths to fit within new margins
+        yield table(totals_data, [70, 90, 100, 100, 80, 80], TOTALS_GRID)
+
+    doc.build(chain(elements, payroll_tables()))
+
+    print("✅ Muster Roll PDF Generated Successfully!")
@@ -0,0 +1,127 @@
+import re
+from sqlalchemy.orm import joinedload
+from app.models.model import Employee, Payroll, PayrollArchive, db
+from app.models.archive import archived_through
+
+# Keyset (cursor) pagination: each page continues strictly after the last row
+# of the previous one on the ordering key, so every page is an index range
+# scan instead of an OFFSET that re-reads all earlier rows.
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def page_size(value):
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE."""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return PAGE_SIZE
+
+def parse_period(value):
+    """Accept ``yyyymm`` or ``yyyy-mm`` (as sent by <input type="month">)."""
+    if not value:
+        return None
+    match = re.fullmatch(r'(\d{4})-?(\d{2})', str(value).strip())
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise ValueError(f'Invalid period {value!r}; expected YYYYMM or YYYY-MM')
+    return int(match.group(1)) * 100 + int(match.group(2))
+
+def encode_cursor(*values):
+    return '.'.join(str(v) for v in values)
+
+def decode_cursor(cursor):
+    return [int(v) for v in cursor.split('.')]
+
+def _payroll_rows(model, cursor, limit, period, department, employee_id):
+    query = model.query.options(joinedload(model.employee))
+    if period:
+        query = query.filter(model.period == period)
+    if employee_id:
+        query = query.filter(model.employee_id == employee_id)
+    if department:
+        query = query.join(Employee, model.employee_id == Employee.id).filter(Employee.department == department)
+    if cursor:
+        last_period, last_id = cursor
+        query = query.filter(
+            (model.period < last_period) |
+            ((model.period == last_period) & (model.id < last_id))
+        )
+    return query.order_by(model.period.desc(), model.id.desc()).limit(limit).all()
+
+def payroll_page(cursor=None, limit=PAGE_SIZE, period=None, department=None, employee_id=None):
+    """One page of the payroll ledger, newest period first.
+
+    Open years are read from ``payrolls``; a page that runs past them (or a
+    period filter in a closed year) continues in ``payrolls_archive``, whose
+    periods are all older.
+
+    Returns ``(payrolls, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    filters = {'period': period, 'department': department, 'employee_id': employee_id}
+    boundary = archived_through()
+
+    rows = []
+    in_archive = boundary is not None and (
+        (period and period <= boundary) or (position and position[0] <= boundary)
+    )
+    if not in_archive:
+        rows = _payroll_rows(Payroll, position, limit + 1, **filters)
+    if len(rows) <= limit and boundary is not None and not (period and period > boundary):
+        rows += _payroll_rows(PayrollArchive, position, limit + 1 - len(rows), **filters)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].period, rows[-1].id)
+    return rows, next_cursor
+
+def employee_page(cursor=None, limit=PAGE_SIZE, department=None):
+    """One page of the employee directory in id order.
+
+    Returns ``(employees, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    query = Employee.query
+    if department:
+        query = query.filter(Employee.department == department)
+    if cursor:
+        last_id, = decode_cursor(cursor)
+        query = query.filter(Employee.id > last_id)
+
+    rows = query.order_by(Employee.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor
+
+def employee_options():
+    """(id, name, designation) for every employee, for select boxes."""
+    return db.session.query(Employee.id, Employee.name, Employee.designation).order_by(Employee.name).all()
+
+def payroll_to_dict(p):
+    return {
+        'id': p.id,
+        'employee_id': p.employee_id,
+        'employee_name': p.employee.name,
+        'month': p.month,
+        'year': p.year,
+        'period': p.period,
+        'attendance_days': p.attendance_days,
+        'gross_salary': p.gross_salary,
+        'total_deductions': p.total_deductions,
+        'net_salary': p.net_salary,
+        'generated_at': p.generated_at.strftime('%Y-%m-%d') if p.generated_at else None,
+        'archived': p.archived,
+    }
+
+def employee_to_dict(e):
+    return {
+        'id': e.id,
+        'name': e.name,
+        'email': e.email,
+        'designation': e.designation,
+        'department': e.department,
+        'joining_date': e.joining_date.strftime('%Y-%m-%d'),
+        'basic_salary': e.basic_salary,
+    }
@@ -0,0 +1,124 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+import time
+
+# Password hashing off the request thread. hashlib's scrypt and pbkdf2 release
+# the GIL, so a small thread pool bounds how many hashes run at once per
+# process; logins beyond the pool and its queue are turned away instead of
+# piling up behind each other. Stored hashes made with other parameters are
+# replaced on the next successful login.
+
+class HashingBusy(Exception):
+    """Too many password hashes are already queued."""
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+def _get_executor(config):
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            workers = config['PASSWORD_HASH_WORKERS']
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(workers + config['PASSWORD_HASH_QUEUE'])
+        return _executor
+
+def _run(config, fn, *args):
+    executor = _get_executor(config)
+    if not _slots.acquire(timeout=config['PASSWORD_HASH_WAIT']):
+        raise HashingBusy('Too many sign-ins at once, please try again')
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+@lru_cache(maxsize=8)
+def hash_prefix(method):
+    """Method and parameters werkzeug stores for ``method``, e.g. ``scrypt:32768:8:1``."""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+def needs_rehash(pwhash, method):
+    return pwhash.split('$', 1)[0] != hash_prefix(method)
+
+def hash_password(config, password):
+    """Hash ``password`` with the configured method in the hashing pool."""
+    return _run(config, generate_password_hash, password, config['PASSWORD_HASH_METHOD'])
+
+def verify_password(config, user, password):
+    """Check ``password`` for ``user``, rehashing it if the parameters changed.
+
+    The new hash is set on ``user``; the caller commits it.
+    """
+    if not user.password_hash or not _run(config, check_password_hash, user.password_hash, password):
+        return False
+    if needs_rehash(user.password_hash, config['PASSWORD_HASH_METHOD']):
+        user.password_hash = hash_password(config, password)
+    return True
+
+class AttemptLimiter:
+    """Thread-safe sliding-window count of failed sign-ins per key.
+
+    Counts are kept per process, so with several workers the effective
+    limit is at most ``max_attempts`` times the number of workers.
+    """
+
+    def __init__(self, max_attempts, window):
+        self.max_attempts = max_attempts
+        self.window = window
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return None
+        while attempts and now - attempts[0] > self.window:
+            attempts.popleft()
+        if not attempts:
+            del self._attempts[key]
+            return None
+        return attempts
+
+    def retry_after(self, key):
+        """Seconds until ``key`` may try again, or 0 if it is not blocked."""
+        with self._lock:
+            now = time.monotonic()
+            attempts = self._recent(key, now)
+            if attempts is None or len(attempts) < self.max_attempts:
+                return 0
+            return max(1, int(self.window - (now - attempts[0])) + 1)
+
+    def fail(self, key):
+        with self._lock:
+            now = time.monotonic()
+            attempts = self._recent(key, now)
+            if attempts is None:
+                attempts = self._attempts[key] = deque()
+            attempts.append(now)
+            # Drop expired keys now and then so one-off addresses do not accumulate
+            if len(self._attempts) > 10000:
+                for stale in list(self._attempts):
+                    self._recent(stale, now)
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+_limiters = None
+_limiters_lock = threading.Lock()
+
+def get_limiters(config):
+    """Process-wide ``(account, ip)`` failed sign-in limiters."""
+    global _limiters
+    with _limiters_lock:
+        if _limiters is None:
+            window = config['LOGIN_ATTEMPT_WINDOW']
+            _limiters = (
+                AttemptLimiter(config['LOGIN_MAX_ACCOUNT_ATTEMPTS'], window),
+                AttemptLimiter(config['LOGIN_MAX_IP_ATTEMPTS'], window),
+            )
+        return _limiters
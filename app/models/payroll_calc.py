@@ -0,0 +1,62 @@
+import numpy as np
+
+# Standardizing month to 30 days for calculation
+TOTAL_WORKING_DAYS = 30
+
+# Employee contributions, as a share of earned basic
+PF_RATE = 0.12
+ESI_RATE = 0.0075
+
+# Employer contributions: PF matches 12%, ESI is 3.25% vs employee 0.75%
+EMPLOYER_PF_RATE = 0.12
+EMPLOYER_ESI_RATE = 0.0325
+
+# Income tax deducted at source is not computed on the payslips yet; Form 16
+# reports this share of the year's gross as an estimate
+TDS_RATE = 0.05
+
+# Components stored on every Payroll row when it is generated
+PAYSLIP_FIELDS = (
+    'gross_salary', 'earned_basic', 'pf', 'esi',
+    'employer_pf', 'employer_esi', 'total_deductions', 'net_salary',
+)
+
+
+def calculate_payroll(basic_salaries, attendance_days):
+    """Compute payslip components for many employees at once.
+
+    ``basic_salaries`` and ``attendance_days`` are equal-length sequences
+    (lists, tuples or arrays); a missing attendance value counts as 0 days.
+    Returns a dict of NumPy arrays, each rounded to 2 decimals:
+    ``gross_salary``, ``earned_basic``, ``pf``, ``esi``, ``total_deductions``,
+    ``net_salary``, ``employer_pf`` and ``employer_esi``. Gross is the earned
+    basic, as there are no allowances yet.
+    """
+    basic = np.asarray(basic_salaries, dtype=float)
+    days = np.nan_to_num(np.asarray(attendance_days, dtype=float))
+
+    # 1. Earned Basic Salary (pro-rata): (Basic / 30) * Days Present
+    earned_basic = basic / TOTAL_WORKING_DAYS * days
+
+    # 2. Deductions
+    pf = earned_basic * PF_RATE
+    esi = earned_basic * ESI_RATE
+
+    # 3. Net Salary, from the unrounded components
+    net_salary = earned_basic - pf - esi
+
+    return {
+        'gross_salary': np.round(earned_basic, 2),
+        'earned_basic': np.round(earned_basic, 2),
+        'pf': np.round(pf, 2),
+        'esi': np.round(esi, 2),
+        'total_deductions': np.round(pf + esi, 2),
+        'net_salary': np.round(net_salary, 2),
+        'employer_pf': np.round(earned_basic * EMPLOYER_PF_RATE, 2),
+        'employer_esi': np.round(earned_basic * EMPLOYER_ESI_RATE, 2),
+    }
+
+def payslips(components):
+    """Split ``calculate_payroll`` output into one dict of PAYSLIP_FIELDS per employee."""
+    columns = [components[field].tolist() for field in PAYSLIP_FIELDS]
+    return [dict(zip(PAYSLIP_FIELDS, values)) for values in zip(*columns)]
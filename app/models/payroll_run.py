@@ -0,0 +1,75 @@
+from sqlalchemy import insert
+from app.models.model import Employee, Payroll, Attendance, db, period_key
+from app.models.payroll_calc import calculate_payroll, payslips
+from app.models.rollup import record_payrolls
+from app.models.archive import check_open
+
+
+def close_month(month, year, default_days=None):
+    """Generate payroll for every employee for one month in a single pass.
+
+    Attendance, employees and already generated payrolls for the period are
+    loaded with one query each, every payslip is computed in memory and the
+    new rows are written with one bulk INSERT inside a single transaction.
+
+    Returns a tuple ``(created, skipped)`` where ``created`` is the number of
+    payroll rows inserted and ``skipped`` is a list of
+    ``{'employee_id', 'name', 'reason'}`` dicts.
+    """
+    period = period_key(month, year)
+    check_open(period)
+    attendance = dict(
+        db.session.query(Attendance.employee_id, Attendance.present_days)
+        .filter(Attendance.period == period)
+        .all()
+    )
+    existing = {
+        row.employee_id
+        for row in db.session.query(Payroll.employee_id)
+        .filter(Payroll.period == period)
+    }
+    employees = db.session.query(Employee.id, Employee.name, Employee.basic_salary).all()
+
+    payable = []
+    skipped = []
+    for emp in employees:
+        if emp.id in existing:
+            skipped.append({'employee_id': emp.id, 'name': emp.name, 'reason': 'Payroll already exists'})
+            continue
+
+        attendance_days = attendance.get(emp.id, default_days)
+        if attendance_days is None:
+            skipped.append({'employee_id': emp.id, 'name': emp.name, 'reason': 'No attendance record'})
+            continue
+        if attendance_days < 0 or attendance_days > 31:
+            skipped.append({'employee_id': emp.id, 'name': emp.name, 'reason': f'Invalid attendance days ({attendance_days})'})
+            continue
+
+        payable.append((emp, attendance_days))
+
+    rows = []
+    if payable:
+        components = calculate_payroll(
+            [emp.basic_salary for emp, _ in payable],
+            [days for _, days in payable],
+        )
+        for (emp, attendance_days), payslip in zip(payable, payslips(components)):
+            rows.append({
+                'employee_id': emp.id,
+                'month': month,
+                'year': year,
+                'period': period,
+                'attendance_days': attendance_days,
+                **payslip,
+            })
+
+    try:
+        if rows:
+            db.session.execute(insert(Payroll), rows)
+            record_payrolls(rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return len(rows), skipped
@@ -0,0 +1,60 @@
+from itertools import islice
+from reportlab.platypus import SimpleDocTemplate
+import tempfile
+
+# Rows per table chunk, roughly one A4 page with the default styles.
+ROWS_PER_CHUNK = 35
+
+# Flowables kept ahead of the one being laid out, so keepWithNext headings
+# can still be grouped with what follows them.
+LOOKAHEAD = 3
+
+# Rendered PDFs stay in memory up to this size, then spill to a temp file.
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
+class StreamingDocTemplate(SimpleDocTemplate):
+    """A SimpleDocTemplate whose ``build`` takes any iterable of flowables.
+
+    ReportLab lays out flowables from the front of a list; this template
+    keeps that list topped up to LOOKAHEAD items from the iterator around
+    each ``handle_flowable`` call, so only the next few flowables are ever
+    held in memory.
+    """
+
+    def build(self, flowables, **kwargs):
+        self._source = iter(flowables)
+        self._pending = []
+        self._top_up()
+        super().build(self._pending, **kwargs)
+        # Fail loudly rather than truncate the report if a ReportLab upgrade
+        # stops the layout loop without going through handle_flowable
+        if self._source is not None:
+            raise RuntimeError('ReportLab finished the document before all flowables were laid out')
+
+    def handle_flowable(self, flowables):
+        # Also called on ReportLab's own lists (e.g. hanging page breaks)
+        if flowables is not self._pending:
+            return super().handle_flowable(flowables)
+        self._top_up()
+        super().handle_flowable(flowables)
+        self._top_up()
+
+    def _top_up(self):
+        while self._source is not None and len(self._pending) < LOOKAHEAD:
+            try:
+                self._pending.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+def chunked(iterable, size=ROWS_PER_CHUNK):
+    """Yield lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def spooled_output():
+    """File object to render a report into before streaming it to the client."""
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
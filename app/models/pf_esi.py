@@ -1,23 +1,14 @@
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from reportlab.platypus import Paragraph, Spacer
 from reportlab.lib.units import inch
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import HRFlowable
+from itertools import chain
+from app.models.model import current_period
+from app.models.pdf_stream import chunked, ROWS_PER_CHUNK
+from app.models.report_templates import (
+    document, title_block, table, cached_header, period_label, NORMAL, SECTION, GRID, CONTRIBUTION_GRID
+)
 
-def generate_pf_esi_summary(filename="PF_ESI_Monthly_Summary_Feb_2026.pdf", employees=None, company=None):
-    if company is None:
-        company = {}
-
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    elements = []
-    styles = getSampleStyleSheet()
-
-    # Title
-    elements.append(Paragraph("PF & ESI MONTHLY CONTRIBUTION SUMMARY - Feb 2026", styles["Heading1"]))
-    elements.append(Spacer(1, 0.2 * inch))
-    elements.append(HRFlowable(width="100%"))
-    elements.append(Spacer(1, 0.2 * inch))
+def _header(company, month):
+    yield from title_block(f"PF & ESI MONTHLY CONTRIBUTION SUMMARY - {month}")
 
     # Organization Info
     org_data = [
@@ -25,78 +16,70 @@ def generate_pf_esi_summary(filename="PF_ESI_Monthly_Summary_Feb_2026.pdf", empl
         ["PF Account:", company.get('pf_code', "DL/ABC/12345")],
         ["ESI Code:", company.get('esi_code', "270000000000000001")]
     ]
-
-    org_table = Table(org_data, colWidths=[120, 300])
-    org_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 1, colors.black)
-    ]))
-
-    elements.append(org_table)
-    elements.append(Spacer(1, 0.3 * inch))
-
-    # PF Contribution Section
-    elements.append(Paragraph("PROVIDENT FUND (PF) CONTRIBUTION:", styles["Heading3"]))
-    elements.append(Spacer(1, 0.2 * inch))
-
-    pf_headers = ["Employee", "Employee PF (Rs.)", "Employer PF (Rs.)", "Total PF (Rs.)"]
-    pf_data = [pf_headers]
-
-    if employees:
-        for emp in employees:
-            pf_data.append([
-                emp.get('name', ''),
-                emp.get('emp_pf', '0'),
-                emp.get('employer_pf', '0'),
-                emp.get('total_pf', '0')
-            ])
-    else:
-        pf_data.append(["Raj Kumar", "900", "900", "1,800"])
-
-    pf_table = Table(pf_data)
-    pf_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('ALIGN', (1,1), (-1,-1), 'CENTER')
-    ]))
-
-    elements.append(pf_table)
-    elements.append(Spacer(1, 0.2 * inch))
-
-    elements.append(Paragraph("Total PF Due: (Calculated based on above)", styles["Normal"]))
-    elements.append(Paragraph("ECR Filed: Yes | Payment Status: Pending (Due: 15th)", styles["Normal"]))
-    elements.append(Spacer(1, 0.3 * inch))
-
-    # ESI Section
-    elements.append(Paragraph("ESIC CONTRIBUTION (Salary < Rs. 21,000):", styles["Heading3"]))
-    elements.append(Spacer(1, 0.2 * inch))
-
-    esi_headers = ["Employee", "Employee ESI (Rs.)", "Employer ESI (Rs.)", "Total ESI (Rs.)"]
-    esi_data = [esi_headers]
-
-    if employees:
-        for emp in employees:
-            esi_data.append([
-                emp.get('name', ''),
-                emp.get('emp_esi', '0'),
-                emp.get('employer_esi', '0'),
-                emp.get('total_esi', '0')
-            ])
-    else:
-        esi_data.append(["Raj Kumar", "135", "270", "405"])
-
-    esi_table = Table(esi_data)
-    esi_table.setStyle(TableStyle([
-        ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('ALIGN', (1,1), (-1,-1), 'CENTER')
-    ]))
-
-    elements.append(esi_table)
-    elements.append(Spacer(1, 0.2 * inch))
-
-    elements.append(Paragraph("Total ESI Due: (Calculated based on above)", styles["Normal"]))
-    elements.append(Paragraph("Payment Status: Pending (Due: 21st)", styles["Normal"]))
-
-    doc.build(elements)
-
-    print("✅ PF & ESI Summary PDF Generated Successfully!")
\ No newline at end of file
+    yield table(org_data, [120, 300], GRID)
+    yield Spacer(1, 0.3 * inch)
+
+def generate_pf_esi_summary(filename, employees=None, company=None, rows_per_table=ROWS_PER_CHUNK, progress=None, period=None):
+    """Render the PF & ESI summary for ``period`` (yyyymm, default the current
+    month) to ``filename`` (a path or a writable file).
+
+    ``employees`` is a list of row dicts, or a zero-argument callable that
+    returns a fresh iterable of rows; it is called once per section so large
+    rosters can be streamed twice instead of held in memory. ``progress`` is
+    passed to ReportLab's ``setProgressCallBack``.
+    """
+    if company is None:
+        company = {}
+    period = period or current_period()
+
+    doc = document(filename, progress=progress)
+    month = period_label(period)
+    elements = cached_header('pf_esi', company, _header, f"{month[:3]} {period // 100}")
+
+    def contribution_tables(headers, keys, sample_row):
+        # Each section needs its own pass over the rows; a callable gives a
+        # fresh iterator (e.g. a new server-side cursor) every time.
+        rows = employees() if callable(employees) else employees
+        if not rows:
+            rows = [dict(zip(keys, sample_row))]
+        for chunk in chunked(rows, rows_per_table):
+            data = [headers]
+            for emp in chunk:
+                data.append([emp.get(keys[0], '')] + [emp.get(key, '0') for key in keys[1:]])
+
+            # Fixed widths keep the columns aligned from one chunk to the next
+            yield table(data, [150, 100, 100, 90], CONTRIBUTION_GRID, repeatRows=1)
+
+    def sections():
+        # PF Contribution Section
+        yield Paragraph("PROVIDENT FUND (PF) CONTRIBUTION:", SECTION)
+        yield Spacer(1, 0.2 * inch)
+
+        yield from contribution_tables(
+            ["Employee", "Employee PF (Rs.)", "Employer PF (Rs.)", "Total PF (Rs.)"],
+            ['name', 'emp_pf', 'employer_pf', 'total_pf'],
+            ["Raj Kumar", "900", "900", "1,800"]
+        )
+        yield Spacer(1, 0.2 * inch)
+
+        yield Paragraph("Total PF Due: (Calculated based on above)", NORMAL)
+        yield Paragraph("ECR Filed: Yes | Payment Status: Pending (Due: 15th)", NORMAL)
+        yield Spacer(1, 0.3 * inch)
+
+        # ESI Section
+        yield Paragraph("ESIC CONTRIBUTION (Salary < Rs. 21,000):", SECTION)
+        yield Spacer(1, 0.2 * inch)
+
+        yield from contribution_tables(
+            ["Employee", "Employee ESI (Rs.)", "Employer ESI (Rs.)", "Total ESI (Rs.)"],
+            ['name', 'emp_esi', 'employer_esi', 'total_esi'],
+            ["Raj Kumar", "135", "270", "405"]
+        )
+        yield Spacer(1, 0.2 * inch)
+
+        yield Paragraph("Total ESI Due: (Calculated based on above)", NORMAL)
+        yield Paragraph("Payment Status: Pending (Due: 21st)", NORMAL)
+
+    doc.build(chain(elements, sections()))
+
+    print("✅ PF & ESI Summary PDF Generated Successfully!")
@@ -0,0 +1,148 @@
+from sqlalchemy import select
+import hashlib
+import json
+import os
+import tempfile
+import time
+from app.models.model import Employee, db
+from app.models.payroll_calc import PAYSLIP_FIELDS
+from app.models.archive import payroll_model, attendance_model
+from app.models.reports import company_details, form16_data, BATCH_SIZE
+from app.tenancy import current_company_id
+
+# Generated PDFs are stored on disk under a hash of everything that goes into
+# them, so an unchanged report is served from the cache (or answered with a
+# 304 Not Modified) instead of being queried and rendered again.
+
+# Bump when a generator's layout changes so old PDFs stop matching
+RENDER_VERSION = 1
+
+def _update(digest, value):
+    digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+    digest.update(b'\n')
+
+def report_fingerprint(report_type, user_id, period, year=None):
+    """Content hash of the inputs of ``report_type`` for ``period`` (Form 16: financial ``year``)."""
+    digest = hashlib.sha256()
+    _update(digest, [RENDER_VERSION, report_type, period, current_company_id(), company_details()])
+
+    if report_type == 'form16':
+        _update(digest, form16_data(user_id, year))
+    else:
+        employees = db.session.execute(
+            select(Employee.id, Employee.name, Employee.basic_salary)
+            .order_by(Employee.id)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        for row in employees:
+            _update(digest, list(row))
+        PayrollTable, AttendanceTable = payroll_model(period), attendance_model(period)
+        attendance = db.session.execute(
+            select(AttendanceTable.employee_id, AttendanceTable.present_days)
+            .filter(AttendanceTable.period == period)
+            .order_by(AttendanceTable.employee_id)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        for row in attendance:
+            _update(digest, list(row))
+        # Employees already paid for the period are reported from their payroll row
+        payrolls = db.session.execute(
+            select(PayrollTable.employee_id, PayrollTable.attendance_days,
+                   *(getattr(PayrollTable, field) for field in PAYSLIP_FIELDS))
+            .filter(PayrollTable.period == period)
+            .order_by(PayrollTable.employee_id)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        for row in payrolls:
+            _update(digest, list(row))
+
+    return digest.hexdigest()
+
+class ReportCache:
+    """Directory of rendered PDFs named by fingerprint, with age and size limits."""
+
+    def __init__(self, directory, max_bytes, max_age):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def get(self, key):
+        """The cached PDF for ``key`` opened for reading, or None.
+
+        A hit refreshes the entry's mtime, so age and size eviction drop the
+        least recently used reports first. The open file stays readable even
+        if another worker evicts the entry before it has been sent.
+        """
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                return None
+            report = open(path, 'rb')
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return report
+
+    def put(self, key, render):
+        """Store the output of ``render(fileobj)`` under ``key`` and return it opened for reading.
+
+        The new entry is never evicted by its own write, even when it alone
+        is larger than max_bytes; it goes on a later eviction instead.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        # A unique temporary name per writer: threads of one process share a pid
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                render(output)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        report = open(path, 'rb')
+        self.evict(keep=path)
+        return report
+
+    def evict(self, keep=None):
+        """Drop entries past max_age, then the oldest until under max_bytes.
+
+        The entry at path ``keep`` is left alone and not counted.
+        """
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pdf'):
+                continue
+            path = os.path.join(self.directory, name)
+            if path == keep:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,227 @@
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+import multiprocessing
+import threading
+import zipfile
+import json
+import io
+import os
+import time
+import uuid
+
+# Report rendering runs in a pool of worker processes so ReportLab's CPU work
+# never ties up a web worker. Job state lives in small JSON files next to the
+# rendered PDF, so any web worker process can answer status and download
+# requests for a job submitted through another one.
+
+# Finished jobs (and their PDFs) are removed after this many seconds
+JOB_TTL = 24 * 60 * 60
+
+# Per-employee failures listed in a bulk job's status (all go into errors.txt)
+MAX_REPORTED_ERRORS = 100
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Set in each worker process by _init_worker
+_worker_app = None
+
+def _get_executor(max_workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, not fork: the web worker holds DB connections and threads
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _executor
+
+def _init_worker():
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app()
+
+def _status_path(jobs_dir, job_id):
+    return os.path.join(jobs_dir, f'{job_id}.json')
+
+def result_path(jobs_dir, job):
+    """Path of the finished output for the ``job`` status dict."""
+    return os.path.join(jobs_dir, job['result'])
+
+def _write_status(jobs_dir, job_id, **fields):
+    path = _status_path(jobs_dir, job_id)
+    status = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            status = json.load(f)
+    status.update(fields)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp, path)
+    return status
+
+def get_job(jobs_dir, job_id):
+    """Status dict for ``job_id``, or None if it does not exist."""
+    # Job ids are generated hex strings; refuse anything that could escape jobs_dir
+    if not job_id.isalnum():
+        return None
+    try:
+        with open(_status_path(jobs_dir, job_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _cleanup(jobs_dir):
+    cutoff = time.time() - JOB_TTL
+    for name in os.listdir(jobs_dir):
+        path = os.path.join(jobs_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+def _new_job(jobs_dir, report_type, user_id, result, mimetype, **fields):
+    os.makedirs(jobs_dir, exist_ok=True)
+    _cleanup(jobs_dir)
+
+    job_id = uuid.uuid4().hex
+    _write_status(
+        jobs_dir, job_id,
+        id=job_id, report_type=report_type, user_id=user_id, status='queued',
+        result=result.format(job_id=job_id), mimetype=mimetype, filename=None, error=None,
+        created_at=datetime.now().isoformat(timespec='seconds'), finished_at=None, **fields
+    )
+    return job_id
+
+def submit_report_job(jobs_dir, report_type, user_id, company_id, max_workers=2, period=None, year=None):
+    """Queue ``report_type`` for ``user_id`` of ``company_id`` and return the new job id.
+
+    ``period`` and ``year`` are passed on to render_report.
+    """
+    job_id = _new_job(jobs_dir, report_type, user_id, '{job_id}.pdf', 'application/pdf', pages=0)
+    _get_executor(max_workers).submit(_run_job, jobs_dir, job_id, report_type, user_id, company_id, period, year)
+    return job_id
+
+def _run_job(jobs_dir, job_id, report_type, user_id, company_id, period, year):
+    from app.models.reports import render_report
+    from app.tenancy import scope
+
+    _write_status(jobs_dir, job_id, status='running')
+    pages = [0]
+    last_write = [0.0]
+
+    def progress(kind, value):
+        # Record rendered pages, at most about once a second
+        if kind != 'PAGE':
+            return
+        pages[0] = value
+        if time.monotonic() - last_write[0] >= 1:
+            last_write[0] = time.monotonic()
+            _write_status(jobs_dir, job_id, pages=value)
+
+    path = os.path.join(jobs_dir, f'{job_id}.pdf')
+    tmp = f'{path}.tmp'
+    try:
+        with _worker_app.app_context(), scope(company_id):
+            with open(tmp, 'wb') as output:
+                filename = render_report(report_type, user_id, output, progress=progress, period=period, year=year)
+        os.replace(tmp, path)
+        _write_status(jobs_dir, job_id, status='finished', filename=filename, pages=pages[0],
+                      finished_at=datetime.now().isoformat(timespec='seconds'))
+    except Exception as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        _write_status(jobs_dir, job_id, status='failed', error=str(e),
+                      finished_at=datetime.now().isoformat(timespec='seconds'))
+
+def submit_form16_bulk_job(app, jobs_dir, user_id, company_id, max_workers=2, year=None):
+    """Queue Form 16 for financial ``year`` (see form16_year) for every employee
+    of ``company_id`` as one ZIP and return the job id.
+
+    A coordinator thread in this process streams employee rows from the
+    database and fans the PDF rendering out across the worker pool.
+    """
+    job_id = _new_job(jobs_dir, 'form16_bulk', user_id, '{job_id}.zip', 'application/zip',
+                      total=0, done=0, failed=0, errors=[])
+    executor = _get_executor(max_workers)
+    threading.Thread(
+        target=_run_form16_bulk, args=(app, executor, max_workers, jobs_dir, job_id, company_id, year), daemon=True
+    ).start()
+    return job_id
+
+def _render_form16(data, company_data):
+    from app.models.Form_16 import generate_form16
+
+    buffer = io.BytesIO()
+    generate_form16(buffer, data, company_data)
+    return buffer.getvalue()
+
+def _run_form16_bulk(app, executor, max_workers, jobs_dir, job_id, company_id, year):
+    from app.models.model import Employee
+    from app.models.reports import company_details, form16_bulk_rows
+    from app.tenancy import scope
+
+    path = os.path.join(jobs_dir, f'{job_id}.zip')
+    tmp = f'{path}.tmp'
+    done = failed = 0
+    errors = []
+    last_write = 0.0
+
+    def record_error(employee_id, name, error):
+        nonlocal failed
+        failed += 1
+        errors.append({'employee_id': employee_id, 'name': name, 'error': str(error)})
+
+    try:
+        with app.app_context(), scope(company_id):
+            company_data = company_details()
+            total = Employee.query.count()
+            _write_status(jobs_dir, job_id, status='running', total=total)
+
+            # Keep a bounded number of renders in flight so memory stays flat
+            max_pending = max_workers * 4
+            pending = {}
+            with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as archive:
+                def collect(futures):
+                    nonlocal done
+                    for future in futures:
+                        employee_id, name = pending.pop(future)
+                        try:
+                            archive.writestr(f'Form16_{employee_id}.pdf', future.result())
+                            done += 1
+                        except Exception as e:
+                            record_error(employee_id, name, e)
+
+                for employee_id, name, data in form16_bulk_rows(year):
+                    if isinstance(data, Exception):
+                        record_error(employee_id, name, data)
+                        continue
+                    pending[executor.submit(_render_form16, data, company_data)] = (employee_id, name)
+                    if len(pending) >= max_pending:
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(finished)
+
+                    if time.monotonic() - last_write >= 1:
+                        last_write = time.monotonic()
+                        _write_status(jobs_dir, job_id, done=done, failed=failed)
+
+                collect(wait(pending)[0])
+
+                if errors:
+                    archive.writestr('errors.txt', '\n'.join(
+                        f"{e['employee_id']}\t{e['name']}\t{e['error']}" for e in errors
+                    ))
+
+        os.replace(tmp, path)
+        _write_status(jobs_dir, job_id, status='finished', filename='Form16_All_Employees.zip',
+                      done=done, failed=failed, errors=errors[:MAX_REPORTED_ERRORS],
+                      finished_at=datetime.now().isoformat(timespec='seconds'))
+    except Exception as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        _write_status(jobs_dir, job_id, status='failed', error=str(e), done=done, failed=failed, errors=errors[:MAX_REPORTED_ERRORS],
+                      finished_at=datetime.now().isoformat(timespec='seconds'))
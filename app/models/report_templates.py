@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle, HRFlowable
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.lib.pagesizes import A4
+import calendar
+import threading
+from app.models.pdf_stream import StreamingDocTemplate
+
+# Shared layout for the ReportLab reports. Styles, table styles and page
+# layouts are built once per process instead of on every render, and the
+# title / company blocks at the top of each report are built once per
+# company version and reused by every later render (one per employee in a
+# bulk Form 16 run). Reports use the built-in Helvetica family, so there are
+# no fonts to register.
+
+STYLES = getSampleStyleSheet()
+TITLE = STYLES["Heading1"]
+SECTION = STYLES["Heading3"]
+NORMAL = STYLES["Normal"]
+
+def _header_grid(background, align_from=None):
+    """Bordered table with a shaded first row; ``align_from`` centres the
+    body cells from that column on."""
+    commands = [
+        ('GRID', (0,0), (-1,-1), 1, colors.black),
+        ('BACKGROUND', (0,0), (-1,0), background),
+    ]
+    if align_from is not None:
+        commands.append(('ALIGN', (align_from,1), (-1,-1), 'CENTER'))
+    return TableStyle(commands)
+
+GRID = TableStyle([
+    ('GRID', (0,0), (-1,-1), 1, colors.black),
+])
+DETAILS_GRID = _header_grid(colors.lightgrey)
+SUMMARY_GRID = _header_grid(colors.grey)
+INFO_GRID = _header_grid(colors.whitesmoke)
+MUSTER_GRID = _header_grid(colors.lightgrey, align_from=2)
+CONTRIBUTION_GRID = _header_grid(colors.lightgrey, align_from=1)
+TOTALS_GRID = TableStyle([
+    ('GRID', (0,0), (-1,-1), 1, colors.black),
+    ('BACKGROUND', (0,0), (-1,-1), colors.whitesmoke),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+])
+
+# Document template arguments per page layout
+PAGE_LAYOUTS = {
+    'portrait': {'pagesize': A4},
+    # Narrow margins for the wide muster roll table
+    'wide': {'pagesize': A4, 'rightMargin': 30, 'leftMargin': 30, 'topMargin': 30, 'bottomMargin': 30},
+}
+
+# Header blocks kept per thread, for the most recently used companies
+HEADER_CACHE_SIZE = 32
+
+_headers = threading.local()
+
+def document(output, layout='portrait', progress=None):
+    """A StreamingDocTemplate writing to ``output`` with one of PAGE_LAYOUTS."""
+    doc = StreamingDocTemplate(output, **PAGE_LAYOUTS[layout])
+    if progress:
+        doc.setProgressCallBack(progress)
+    return doc
+
+def period_label(period):
+    """``February 2026`` for the pay period 202602."""
+    return f"{calendar.month_name[period % 100]} {period // 100}"
+
+def title_block(title, subtitle=None):
+    """Report title, optional subtitle and rule, as the reports open."""
+    flowables = [Paragraph(title, TITLE)]
+    if subtitle:
+        flowables += [Spacer(1, 0.1 * inch), Paragraph(subtitle, NORMAL)]
+    flowables += [Spacer(1, 0.2 * inch), HRFlowable(width="100%"), Spacer(1, 0.2 * inch)]
+    return flowables
+
+def table(data, col_widths, style, **kwargs):
+    t = Table(data, colWidths=col_widths, **kwargs)
+    t.setStyle(style)
+    return t
+
+def cached_header(kind, company, build, *args):
+    """Flowables from ``build(company, *args)``, built once per company version.
+
+    ``company`` is the company_details() dict; any change to it (or to
+    ``args``) builds a new header. Flowables keep layout state while a
+    document is built, so each thread keeps its own copies.
+    """
+    cache = getattr(_headers, 'cache', None)
+    if cache is None:
+        cache = _headers.cache = OrderedDict()
+    key = (kind, tuple(sorted(company.items())), args)
+    flowables = cache.get(key)
+    if flowables is None:
+        flowables = cache[key] = tuple(build(company, *args))
+        if len(cache) > HEADER_CACHE_SIZE:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return flowables
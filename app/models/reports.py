@@ -0,0 +1,225 @@
+from sqlalchemy import select
+from app.models.model import User, Employee, SalaryYearToDate, current_period, financial_year, db
+from app.models.archive import payroll_model, attendance_model, financial_year_label
+from app.models.payroll_calc import calculate_payroll, payslips, PAYSLIP_FIELDS, TOTAL_WORKING_DAYS
+from app.models.Form_16 import generate_form16
+from app.models.muster_roll import generate_muster_roll
+from app.models.pf_esi import generate_pf_esi_summary
+from app.metrics import REPORT_RENDER
+from app.tenancy import current_company
+
+# Employees fetched per round trip when streaming rows from the database
+BATCH_SIZE = 500
+
+REPORT_FILENAMES = {
+    'form16': "Form16_{user_id}.pdf",
+    'muster': "MusterRoll_{user_id}.pdf",
+    'pf_esi': "PF_ESI_{user_id}.pdf",
+}
+
+REPORT_TITLES = {
+    'form16': "Form 16",
+    'muster': "Muster Roll",
+    'pf_esi': "PF & ESI Summary",
+}
+
+# Reports only administrators may generate
+ADMIN_REPORTS = {'muster', 'pf_esi'}
+
+def company_details():
+    company = current_company()
+    return {
+        'name': company.name if company else "XYZ Pvt Ltd",
+        'address': company.address if company else "Delhi NCR",
+        'pan': company.pan_number if company else "AAAPZ1234C",
+        'tan': company.tan_number if company else "DELC12345D",
+        'pf_code': company.pf_code if company else "DL/ABC/12345",
+        'esi_code': company.esi_code if company else "270000000000000001",
+        'pt_circle': company.pt_circle if company and company.pt_circle else "Delhi"
+    }
+
+def period_components(employees, period):
+    """Attendance days and payslip components for ``employees`` for one period.
+
+    ``employees`` are rows with id and basic_salary. Employees already paid
+    for the period get the components stored on their payroll; the rest are
+    computed from the Attendance table, treating a missing record as the
+    full month. Returns two lists in the order of ``employees``.
+    """
+    ids = [emp.id for emp in employees]
+    PayrollTable, AttendanceTable = payroll_model(period), attendance_model(period)
+    paid = {
+        row.employee_id: row
+        for row in db.session.query(
+            PayrollTable.employee_id, PayrollTable.attendance_days,
+            *(getattr(PayrollTable, field) for field in PAYSLIP_FIELDS),
+        ).filter(PayrollTable.period == period, PayrollTable.employee_id.in_(ids))
+    }
+    unpaid = [emp for emp in employees if emp.id not in paid]
+    computed = {}
+    if unpaid:
+        attendance = dict(
+            db.session.query(AttendanceTable.employee_id, AttendanceTable.present_days)
+            .filter(AttendanceTable.period == period, AttendanceTable.employee_id.in_([emp.id for emp in unpaid]))
+            .all()
+        )
+        unpaid_days = [attendance.get(emp.id, TOTAL_WORKING_DAYS) for emp in unpaid]
+        slips = payslips(calculate_payroll([emp.basic_salary for emp in unpaid], unpaid_days))
+        computed = {emp.id: pair for emp, pair in zip(unpaid, zip(unpaid_days, slips))}
+
+    days, components = [], []
+    for emp in employees:
+        row = paid.get(emp.id)
+        if row is not None:
+            days.append(row.attendance_days or 0.0)
+            components.append({field: getattr(row, field) for field in PAYSLIP_FIELDS})
+        else:
+            days.append(computed[emp.id][0])
+            components.append(computed[emp.id][1])
+    return days, components
+
+def employee_components(period, batch_size=BATCH_SIZE):
+    """Yield ``(employee, days, components)`` for every employee in id order.
+
+    ``employee`` rows have id, name, basic_salary, uan and esi_number.
+    Employees are read through a server-side cursor ``batch_size`` rows at a
+    time and each batch goes through the payroll kernel in one call.
+    """
+    result = db.session.execute(
+        select(Employee.id, Employee.name, Employee.basic_salary, Employee.uan, Employee.esi_number)
+        .order_by(Employee.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for batch in result.partitions():
+        days, components = period_components(batch, period)
+        yield from zip(batch, days, components)
+
+def paid_components(period, batch_size=BATCH_SIZE):
+    """Yield ``(employee, days, components)`` from the payrolls stored for ``period``.
+
+    Like employee_components, but nothing is estimated: employees without a
+    payroll for the period are left out. For statutory returns, which must
+    report the wages actually paid.
+    """
+    PayrollTable = payroll_model(period)
+    result = db.session.execute(
+        select(Employee.id, Employee.name, Employee.basic_salary, Employee.uan, Employee.esi_number,
+               PayrollTable.attendance_days, *(getattr(PayrollTable, field) for field in PAYSLIP_FIELDS))
+        .join(Employee, PayrollTable.employee_id == Employee.id)
+        .filter(PayrollTable.period == period)
+        .order_by(Employee.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in result:
+        yield row, row.attendance_days or 0.0, {field: getattr(row, field) for field in PAYSLIP_FIELDS}
+
+def has_payrolls(period):
+    """Whether any payroll has been generated for ``period``."""
+    PayrollTable = payroll_model(period)
+    return db.session.query(PayrollTable.id).filter(PayrollTable.period == period).first() is not None
+
+def muster_rows(period):
+    for sl, (emp, days, comp) in enumerate(employee_components(period), 1):
+        yield {
+            'sl': str(sl),
+            'name': emp.name,
+            'present': f"{days:g}",
+            'gross': f"{comp['gross_salary']:.2f}",
+            'deduction': f"{comp['total_deductions']:.2f}",
+            'net': f"{comp['net_salary']:.2f}",
+            'pf': f"{comp['pf']:.2f}",
+            'esi': f"{comp['esi']:.2f}"
+        }
+
+def pf_esi_rows(period):
+    for emp, _, comp in employee_components(period):
+        pf, employer_pf = comp['pf'], comp['employer_pf']
+        esi, employer_esi = comp['esi'], comp['employer_esi']
+        yield {
+            'name': emp.name,
+            'emp_pf': f"{pf:.2f}",
+            'employer_pf': f"{employer_pf:.2f}",
+            'total_pf': f"{pf + employer_pf:.2f}",
+            'emp_esi': f"{esi:.2f}",
+            'employer_esi': f"{employer_esi:.2f}",
+            'total_esi': f"{esi + employer_esi:.2f}"
+        }
+
+def form16_year(year=None):
+    """Financial year Form 16 covers: ``year`` (its start year) if given, else
+    the last completed one, as Form 16 is issued after the year closes."""
+    return year if year is not None else financial_year(current_period()) - 1
+
+def employee_form16_data(employee, ytd, year):
+    """Form 16 figures from the employee's SalaryYearToDate row (None if unpaid this year)."""
+    paid = ytd.gross_salary if ytd else 0.0
+    tds = ytd.tds if ytd else 0.0
+    return {
+        'name': employee.name,
+        'pan': employee.pan if employee.pan else "Not Found",
+        'uan': employee.uan if employee.uan else "Not Found",
+        'period': f"FY {financial_year_label(year)}",
+        'amount_paid': f"Rs. {paid:,.2f}",
+        'tax_deducted': f"Rs. {tds:,.2f}",
+        'tax_deposited': f"Rs. {tds:,.2f}",
+        'taxable_salary': f"Rs. {max(0, paid - 50000):,.2f}" # Standard deduction
+    }
+
+def form16_data(user_id, year=None):
+    # Fetch data for the logged-in user or a default employee
+    current_user = User.query.get(user_id)
+    employee = Employee.query.filter_by(email=current_user.email).first()
+
+    # If admin or no matching employee, use the first employee found
+    if not employee:
+        employee = Employee.query.first()
+
+    if not employee:
+        return {}
+    year = form16_year(year)
+    ytd = SalaryYearToDate.query.filter_by(employee_id=employee.id, financial_year=year).first()
+    return employee_form16_data(employee, ytd, year)
+
+def form16_bulk_rows(year=None, batch_size=BATCH_SIZE):
+    """Yield ``(employee_id, name, data)`` for every employee, streamed in id order.
+
+    A record that cannot be turned into Form 16 data yields its exception
+    in place of ``data`` so one bad row does not stop the batch.
+    """
+    year = form16_year(year)
+    result = db.session.execute(
+        select(Employee.id, Employee.name, Employee.pan, Employee.uan, SalaryYearToDate)
+        .outerjoin(SalaryYearToDate, (SalaryYearToDate.employee_id == Employee.id)
+                   & (SalaryYearToDate.financial_year == year))
+        .order_by(Employee.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for employee in result:
+        try:
+            yield employee.id, employee.name, employee_form16_data(employee, employee.SalaryYearToDate, year)
+        except Exception as e:
+            yield employee.id, employee.name, e
+
+def render_report(report_type, user_id, output, progress=None, period=None, year=None):
+    """Render ``report_type`` into ``output`` (a path or writable file).
+
+    ``period`` (yyyymm) defaults to the current month; Form 16 covers the
+    financial year starting in ``year`` (see form16_year). ``progress`` is
+    an optional ReportLab progress callback ``(kind, value)``.
+    Returns the download filename. Permission checks are the caller's job.
+    """
+    if report_type not in REPORT_FILENAMES:
+        raise ValueError(f'Invalid report type: {report_type}')
+
+    with REPORT_RENDER.time(report_type=report_type):
+        company_data = company_details()
+        period = period or current_period()
+
+        if report_type == 'form16':
+            generate_form16(output, form16_data(user_id, year), company_data, progress=progress)
+        elif report_type == 'muster':
+            generate_muster_roll(output, muster_rows(period), company_data, progress=progress, period=period)
+        else:
+            generate_pf_esi_summary(output, lambda: pf_esi_rows(period), company_data, progress=progress, period=period)
+
+    return REPORT_FILENAMES[report_type].format(user_id=user_id)
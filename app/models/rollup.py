@@ -0,0 +1,207 @@
+from collections import defaultdict
+from types import SimpleNamespace
+from sqlalchemy import func, case, insert
+from app.models.model import (
+    Employee, Payroll, Attendance, PayrollArchive, AttendanceArchive, PeriodSummary, DepartmentSummary,
+    SalaryYearToDate, db, dialect_insert, financial_year,
+)
+from app.models.payroll_calc import TDS_RATE
+from app.models.pdf_stream import chunked
+from app.tenancy import current_company_id
+
+# Summary rows are bumped with INSERT ... ON CONFLICT DO UPDATE so the caller's
+# transaction stays the only writer and no read-modify-write is needed. The
+# record_* functions update the summaries of the current company.
+
+# Summary rows bumped per multi-row INSERT, well under SQLite's bound-parameter limit
+INCREMENT_CHUNK = 500
+
+def _increment(model, key, deltas):
+    key = {'company_id': current_company_id(), **key}
+    stmt = dialect_insert(model).values(**key, **deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={name: model.__table__.c[name] + stmt.excluded[name] for name in deltas},
+    )
+    db.session.execute(stmt)
+
+def _increment_rows(model, key_names, rows):
+    """``_increment`` for many keys at once; ``rows`` map key and delta columns, keys unique."""
+    company_id = current_company_id()
+    for chunk in chunked(rows, INCREMENT_CHUNK):
+        stmt = dialect_insert(model).values([{'company_id': company_id, **row} for row in chunk])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['company_id', *key_names],
+            set_={name: model.__table__.c[name] + stmt.excluded[name] for name in chunk[0] if name not in key_names},
+        )
+        db.session.execute(stmt)
+
+def _department_key(department):
+    return department or ''
+
+def has_compliance_issue(employee):
+    return (employee.pan is None or employee.uan is None
+            or employee.pf_number is None or employee.esi_number is None)
+
+def record_payrolls(payrolls, sign=1):
+    """Add (``sign=1``) or remove (``sign=-1``) payrolls from the period summaries
+    and the employees' year-to-date totals.
+
+    ``payrolls`` is an iterable of objects or mappings with ``employee_id``,
+    ``period``, ``attendance_days`` and the ``gross_salary``,
+    ``total_deductions`` and ``net_salary`` payslip components.
+    """
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    year_to_date = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for p in payrolls:
+        if isinstance(p, dict):
+            p = SimpleNamespace(**p)
+        row = totals[p.period]
+        row[0] += sign
+        row[1] += sign * p.net_salary
+        row[2] += sign * (getattr(p, 'attendance_days', None) or 0.0)
+
+        ytd = year_to_date[p.employee_id, financial_year(p.period)]
+        ytd[0] += sign
+        ytd[1] += sign * p.gross_salary
+        ytd[2] += sign * p.total_deductions
+        ytd[3] += sign * p.net_salary
+
+    for period, (count, net, days) in totals.items():
+        _increment(PeriodSummary, {'period': period}, {
+            'payroll_count': count,
+            'total_net': net,
+            'payroll_attendance_days': days,
+        })
+
+    _increment_rows(SalaryYearToDate, ['employee_id', 'financial_year'], [
+        {'employee_id': employee_id, 'financial_year': year, 'payroll_count': count,
+         'gross_salary': gross, 'total_deductions': deductions, 'net_salary': net, 'tds': gross * TDS_RATE}
+        for (employee_id, year), (count, gross, deductions, net) in year_to_date.items()
+    ])
+
+def record_attendance(period, present_days, previous_days=None):
+    """Account for an attendance row being written for ``period``.
+
+    ``previous_days`` is the old value when an existing row was updated.
+    """
+    _increment(PeriodSummary, {'period': period}, {
+        'attendance_count': 0 if previous_days is not None else 1,
+        'present_days': present_days - (previous_days or 0.0),
+    })
+
+def record_attendance_rows(rows):
+    """Account for many attendance rows being written at once.
+
+    ``rows`` are mappings with ``period``, ``present_days`` and
+    ``previous_days`` (None for rows that did not exist before).
+    """
+    totals = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        total = totals[row['period']]
+        total[0] += 1 if row['previous_days'] is None else 0
+        total[1] += row['present_days'] - (row['previous_days'] or 0.0)
+
+    for period, (count, days) in totals.items():
+        _increment(PeriodSummary, {'period': period}, {
+            'attendance_count': count,
+            'present_days': days,
+        })
+
+def record_employee(employee, sign=1):
+    """Add (``sign=1``) or remove (``sign=-1``) an employee from the department summaries."""
+    _increment(DepartmentSummary, {'department': _department_key(employee.department)}, {
+        'headcount': sign,
+        'compliance_issues': sign if has_compliance_issue(employee) else 0,
+    })
+
+def record_employees(employees):
+    """Add many new employees (objects or mappings) to the department summaries."""
+    totals = defaultdict(lambda: [0, 0])
+    for e in employees:
+        if isinstance(e, dict):
+            e = SimpleNamespace(**e)
+        row = totals[_department_key(e.department)]
+        row[0] += 1
+        row[1] += 1 if has_compliance_issue(e) else 0
+
+    for department, (headcount, issues) in totals.items():
+        _increment(DepartmentSummary, {'department': department}, {
+            'headcount': headcount,
+            'compliance_issues': issues,
+        })
+
+def rebuild_summaries():
+    """Recompute every summary row from the base tables (for backfills).
+
+    Covers the current company, or every company when run unscoped.
+    """
+    db.session.query(PeriodSummary).delete()
+    db.session.query(DepartmentSummary).delete()
+    db.session.query(SalaryYearToDate).delete()
+
+    # Closed financial years live in the archive tables; their periods stay summarized
+    periods = defaultdict(dict)
+    for model in (Payroll, PayrollArchive):
+        payroll_stats = db.session.query(
+            model.company_id,
+            model.period,
+            func.count(model.id),
+            func.sum(model.net_salary),
+            func.sum(func.coalesce(model.attendance_days, 0.0)),
+        ).group_by(model.company_id, model.period)
+        for company_id, period, count, net, days in payroll_stats:
+            periods[company_id, period].update(payroll_count=count, total_net=net or 0.0, payroll_attendance_days=days or 0.0)
+
+    for model in (Attendance, AttendanceArchive):
+        attendance_stats = db.session.query(
+            model.company_id, model.period, func.count(model.id), func.sum(model.present_days)
+        ).group_by(model.company_id, model.period)
+        for company_id, period, count, days in attendance_stats:
+            periods[company_id, period].update(attendance_count=count, present_days=days or 0.0)
+
+    year_to_date = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for model in (Payroll, PayrollArchive):
+        year = model.period // 100 - case((model.period % 100 < 4, 1), else_=0)
+        ytd_stats = db.session.query(
+            model.company_id, model.employee_id, year, func.count(model.id),
+            func.sum(model.gross_salary), func.sum(model.total_deductions), func.sum(model.net_salary),
+        ).group_by(model.company_id, model.employee_id, year)
+        for company_id, employee_id, fy, count, gross, deductions, net in ytd_stats:
+            ytd = year_to_date[company_id, employee_id, fy]
+            ytd[0] += count
+            ytd[1] += gross or 0.0
+            ytd[2] += deductions or 0.0
+            ytd[3] += net or 0.0
+    ytd_rows = [
+        {'company_id': company_id, 'employee_id': employee_id, 'financial_year': fy, 'payroll_count': count,
+         'gross_salary': gross, 'total_deductions': deductions, 'net_salary': net, 'tds': gross * TDS_RATE}
+        for (company_id, employee_id, fy), (count, gross, deductions, net) in year_to_date.items()
+    ]
+
+    period_rows = [
+        {'company_id': company_id, 'period': period, 'payroll_count': 0, 'total_net': 0.0,
+         'payroll_attendance_days': 0.0, 'attendance_count': 0, 'present_days': 0.0, **values}
+        for (company_id, period), values in periods.items()
+    ]
+
+    department = func.coalesce(Employee.department, '')
+    missing_info = (
+        (Employee.pan == None) | (Employee.uan == None) |
+        (Employee.pf_number == None) | (Employee.esi_number == None)
+    )
+    dept_rows = [
+        {'company_id': company_id, 'department': dept, 'headcount': count, 'compliance_issues': issues or 0}
+        for company_id, dept, count, issues in db.session.query(
+            Employee.company_id, department, func.count(Employee.id), func.sum(case((missing_info, 1), else_=0))
+        ).group_by(Employee.company_id, department)
+    ]
+
+    if period_rows:
+        db.session.execute(insert(PeriodSummary), period_rows)
+    if dept_rows:
+        db.session.execute(insert(DepartmentSummary), dept_rows)
+    if ytd_rows:
+        db.session.execute(insert(SalaryYearToDate), ytd_rows)
+    db.session.commit()
+    return len(period_rows), len(dept_rows)
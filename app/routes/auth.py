@@ -1,5 +1,7 @@
-from flask import Blueprint,redirect,render_template,url_for,flash,session,request
+from flask import Blueprint,redirect,render_template,url_for,flash,session,request,current_app
 from app.models.model import User, db
+from app.models.passwords import HashingBusy, get_limiters, hash_password, verify_password
+from app.tenancy import link_company
 
 auth_bp = Blueprint('auth', __name__)
 @auth_bp.route('/')
@@ -22,16 +24,37 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
         
+        # Refuse before hashing anything once an account or address keeps failing
+        accounts, addresses = get_limiters(current_app.config)
+        account_key = (email or '').strip().lower()
+        wait = max(accounts.retry_after(account_key), addresses.retry_after(request.remote_addr))
+        if wait:
+            flash(f'Too many failed sign-in attempts. Try again in {wait} seconds.')
+            return render_template('login.html'), 429, {'Retry-After': str(wait)}
+
         user = User.query.filter_by(email=email).first()
-        
-        if user and user.verify_password(password):
+
+        try:
+            valid = user is not None and verify_password(current_app.config, user, password)
+        except HashingBusy as e:
+            flash(str(e))
+            return render_template('login.html'), 503, {'Retry-After': '1'}
+
+        if valid:
+            link_company(user)
+            if db.session.is_modified(user):
+                db.session.commit()
+            accounts.reset(account_key)
             session['user_id'] = user.id
             session['user_role'] = user.role
+            session['company_id'] = user.company_id
             
             if user.role == 'admin':
                 return redirect(url_for('dashboard.dashboard'))
             return redirect(url_for('employee.employee_dashboard'))
         
+        accounts.fail(account_key)
+        addresses.fail(request.remote_addr)
         flash('Invalid email or password')
     return render_template('login.html')
 
@@ -50,7 +73,13 @@ def signup():
         role = request.form.get('role', 'employee')
         
         if not User.query.filter_by(email=email).first():
-            new_user = User(name=name, email=email, role=role, password=password)
+            try:
+                new_user = User(name=name, email=email, role=role,
+                                password_hash=hash_password(current_app.config, password))
+            except HashingBusy as e:
+                flash(str(e))
+                return render_template('signup.html'), 503, {'Retry-After': '1'}
+            link_company(new_user)
             db.session.add(new_user)
             db.session.commit()
             return redirect(url_for('auth.login'))
@@ -1,14 +1,10 @@
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
-import os
-from app.models.model import Employee, Company, Payroll, User, db
-from sqlalchemy import func
-from datetime import datetime
-
-# Try importing SarvamAI, handle if not present
-try:
-    from sarvamai import SarvamAI
-except ImportError:
-    SarvamAI = None
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, current_app, Response
+import httpx
+import json
+from app.models.chat_index import build_context
+from app.models.chat_client import SarvamAI, ChatTimeout, complete, stream_completion
+from app.models.chat_cache import get_answer_cache, data_version
+from app.tenancy import current_company_id
 
 chat_bp = Blueprint('chat', __name__)
 
@@ -18,98 +14,126 @@ def chat_interface():
         return redirect(url_for('auth.login'))
     return render_template('chat.html')
 
-@chat_bp.route('/api/chat', methods=['POST'])
-def chat_api():
+def _chat_messages(user_message):
+    # Retrieve only the records relevant to the question (RAG - Retrieval Augmented Generation)
+    context = build_context(
+        user_message,
+        top_k=current_app.config['CHAT_TOP_K'],
+        budget=current_app.config['CHAT_CONTEXT_CHARS'],
+        ttl=current_app.config['CHAT_INDEX_TTL'],
+        recent_periods=current_app.config['CHAT_INDEX_PERIODS'],
+    )
+
+    # Personalize the AI context for your MSME Payroll Software
+    system_context = (
+        "You are a helpful AI assistant for 'OSS MSME Finance', an open-source payroll software. "
+        "You have access to the following live database records most relevant to the question (RAG Context):\n\n"
+        
+        f"{context}\n\n"
+        
+        "Instructions:\n"
+        "1. Use the provided data to answer user queries accurately.\n"
+        "2. If asked about a specific employee, check the directory.\n"
+        "3. If asked about payroll or headcount, check the payroll records and summaries.\n"
+        "4. If the information is not in the context, politely say you don't have that data.\n"
+        "5. Be concise and professional."
+    )
+
+    return [
+        {"role": "system", "content": system_context},
+        {"role": "user", "content": user_message}
+    ]
+
+def _validate_chat_request():
+    """The user's message, or an error response tuple."""
     if 'user_id' not in session:
-        return jsonify({'error': 'Unauthorized'}), 401
+        return None, (jsonify({'error': 'Unauthorized'}), 401)
     
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     user_message = data.get('message')
     
     if not user_message:
-        return jsonify({'error': 'Message is required'}), 400
+        return None, (jsonify({'error': 'Message is required'}), 400)
 
-    api_key = os.environ.get('SARVAM_API_KEY')
-    if not api_key:
-        return jsonify({'error': 'Server configuration error: API Key missing'}), 500
+    if not current_app.config['SARVAM_API_KEY']:
+        return None, (jsonify({'error': 'Server configuration error: API Key missing'}), 500)
         
     if not SarvamAI:
-        return jsonify({'error': 'SarvamAI library not installed'}), 500
+        return None, (jsonify({'error': 'SarvamAI library not installed'}), 500)
+
+    return user_message, None
+
+@chat_bp.route('/api/chat', methods=['POST'])
+def chat_api():
+    user_message, error = _validate_chat_request()
+    if error:
+        return error
 
     try:
-        client = SarvamAI(api_subscription_key=api_key)
-        
-        # Fetch Context Data from Database (RAG - Retrieval Augmented Generation)
-        
-        # 1. Company Info
-        company = Company.query.first()
-        company_info = "Not Configured"
-        if company:
-            company_info = (
-                f"Name: {company.name}, Address: {company.address}, "
-                f"GST: {company.gst_number}, PAN: {company.pan_number}, "
-                f"PF Code: {company.pf_code}, ESI Code: {company.esi_code}, "
-                f"PT Circle: {company.pt_circle}"
-            )
-
-        # 2. User Info (Admins/Staff)
-        users = User.query.all()
-        users_info = "\n".join([f"- {u.name} ({u.role}, {u.email})" for u in users])
-
-        # 3. Employee Directory
-        employees = Employee.query.all()
-        employees_info = "\n".join([
-            f"- {e.name} (ID: {e.id}, {e.designation}, Dept: {e.department}, "
-            f"Salary: {e.basic_salary}, Joined: {e.joining_date}, "
-            f"PAN: {e.pan}, UAN: {e.uan})" 
-            for e in employees
-        ])
-
-        # 4. Payroll History (Recent)
-        # Limit to last 20 records to keep context size manageable
-        recent_payrolls = Payroll.query.order_by(Payroll.year.desc(), Payroll.month.desc()).limit(20).all()
-        payroll_info = "\n".join([
-            f"- {p.month} {p.year}: {p.employee.name} (Net: {p.net_salary}, Attendance: {p.attendance_days} days)"
-            for p in recent_payrolls
-        ])
-
-        # Personalize the AI context for your MSME Payroll Software
-        system_context = (
-            "You are a helpful AI assistant for 'OSS MSME Finance', an open-source payroll software. "
-            "You have access to the following live database records (RAG Context):\n\n"
-            
-            "=== COMPANY DETAILS ===\n"
-            f"{company_info}\n\n"
-            
-            "=== SYSTEM USERS (Admins/Staff) ===\n"
-            f"{users_info}\n\n"
-            
-            "=== EMPLOYEE DIRECTORY ===\n"
-            f"{employees_info}\n\n"
-            
-            "=== RECENT PAYROLL RECORDS ===\n"
-            f"{payroll_info}\n\n"
-            
-            "Instructions:\n"
-            "1. Use the provided data to answer user queries accurately.\n"
-            "2. If asked about a specific employee, check the directory.\n"
-            "3. If asked about payroll, check the recent records.\n"
-            "4. If the information is not in the context, politely say you don't have that data.\n"
-            "5. Be concise and professional."
-        )
-
-        response = client.chat.completions(
-            messages=[
-                {"role": "system", "content": system_context},
-                {"role": "user", "content": user_message}
-            ]
-        )
-        
-        # Extract the response content
-        # Assuming SarvamAI follows standard completion response structure
-        ai_reply = response.choices[0].message.content
-        
+        cache = get_answer_cache(current_app.config)
+        key = cache.key(user_message, current_company_id(), session.get('user_role'), data_version())
+        ai_reply = cache.get(key)
+        if ai_reply is None:
+            ai_reply = complete(current_app.config, _chat_messages(user_message))
+            cache.put(key, ai_reply)
         return jsonify({'response': ai_reply})
 
+    except httpx.TimeoutException:
+        return jsonify({'error': 'The assistant took too long to respond'}), 504
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@chat_bp.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Same as /api/chat, but the reply is sent as server-sent events.
+
+    Each fragment arrives as a ``token`` event, followed by ``done`` or
+    ``error``. If the browser disconnects, the server closes the generator
+    and the upstream completion request with it.
+    """
+    user_message, error = _validate_chat_request()
+    if error:
+        return error
+
+    try:
+        cache = get_answer_cache(current_app.config)
+        key = cache.key(user_message, current_company_id(), session.get('user_role'), data_version())
+        cached = cache.get(key)
+        messages = _chat_messages(user_message) if cached is None else None
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    config = current_app.config
+
+    def events():
+        if cached is not None:
+            yield _sse('token', {'text': cached})
+            yield _sse('done', {'cached': True})
+            return
+        try:
+            parts = []
+            for text in stream_completion(config, messages):
+                parts.append(text)
+                yield _sse('token', {'text': text})
+            # Only complete replies are cached, not stopped or failed ones
+            cache.put(key, ''.join(parts))
+            yield _sse('done', {})
+        except (ChatTimeout, httpx.TimeoutException):
+            yield _sse('error', {'error': 'The assistant took too long to respond'})
+        except Exception as e:
+            yield _sse('error', {'error': str(e)})
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+@chat_bp.route('/api/chat/cache')
+def chat_cache_stats():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if session.get('user_role') != 'admin':
+        return jsonify({'error': 'Access denied'}), 403
+    return jsonify(get_answer_cache(current_app.config).stats())
@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from app.models.model import Company, db
+from app.models.model import User, Company, db
+from app.tenancy import current_company
 
 company_bp = Blueprint('company', __name__)
 
@@ -12,7 +13,7 @@ def company_settings():
         flash('Unauthorized access.')
         return redirect(url_for('dashboard.dashboard'))
 
-    company = Company.query.first()
+    company = current_company()
 
     if request.method == 'POST':
         name = request.form.get('name')
@@ -25,8 +26,12 @@ def company_settings():
         pt_circle = request.form.get('pt_circle')
 
         if not company:
+            # First save by a new admin creates their company
             company = Company(name=name, address=address, gst_number=gst, pan_number=pan, tan_number=tan, pf_code=pf, esi_code=esi, pt_circle=pt_circle)
             db.session.add(company)
+            db.session.flush()
+            db.session.get(User, session['user_id']).company_id = company.id
+            session['company_id'] = company.id
         else:
             company.name = name
             company.address = address
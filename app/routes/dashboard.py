@@ -1,8 +1,11 @@
 from flask import Blueprint, render_template, session, redirect, url_for, flash
-from app.models.model import User, Employee, Payroll, db
-from sqlalchemy import func
+from app.models.model import User, Employee, PeriodSummary, DepartmentSummary, db
+from app.models.rollup import rebuild_summaries
+from app.tenancy import resolve_company_id, scope, unscoped
+from app.models.pagination import employee_page, PAGE_SIZE
 from datetime import datetime
 import calendar
+import click
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -21,63 +24,67 @@ def dashboard():
         flash('Unauthorized: Access restricted to administrators.')
         return redirect(url_for('employee.employee_dashboard'))
 
-    # 1. Real-time Stats
-    total_employees = Employee.query.count()
+    # 1. Real-time Stats (read from the pre-aggregated summary tables)
+    dept_summaries = DepartmentSummary.query.order_by(DepartmentSummary.department).all()
+    total_employees = sum(d.headcount for d in dept_summaries)
     
+    # Compliance Issues: Count employees missing critical info (PAN, UAN, etc.)
+    compliance_issues = sum(d.compliance_issues for d in dept_summaries)
+
+    # Last 6 periods, oldest first, handling year rollover
     now = datetime.now()
-    current_month_name = now.strftime('%B')
-    current_year = now.year
+    periods = []
+    for i in range(5, -1, -1):
+        month_idx = (now.month - i - 1) % 12 + 1
+        year = now.year + ((now.month - i - 1) // 12)
+        periods.append(year * 100 + month_idx)
+    current_period = periods[-1]
+
+    summaries = {
+        s.period: s for s in PeriodSummary.query.filter(PeriodSummary.period.in_(periods))
+    }
+    current = summaries.get(current_period)
     
     # Calculate total payroll processed for current month
-    payroll_processed = db.session.query(func.sum(Payroll.net_salary)).filter_by(
-        month=current_month_name, year=current_year
-    ).scalar() or 0.0
-    
-    # Compliance Issues: Count employees missing critical info (PAN, UAN, etc.)
-    compliance_issues = Employee.query.filter(
-        (Employee.pan == None) | (Employee.uan == None) | 
-        (Employee.pf_number == None) | (Employee.esi_number == None)
-    ).count()
+    payroll_processed = current.total_net if current else 0.0
     
     # Pending Reports: Active employees minus payrolls generated this month
-    payrolls_count = Payroll.query.filter_by(
-        month=current_month_name, year=current_year
-    ).count()
+    payrolls_count = current.payroll_count if current else 0
     pending_reports = max(0, total_employees - payrolls_count)
 
     # 2. Attendance Trends (Last 6 months)
     attendance_labels = []
     attendance_data = []
     
-    for i in range(5, -1, -1):
-        # Calculate month/year logic to handle year rollover
-        month_idx = (now.month - i - 1) % 12 + 1
-        year = now.year + ((now.month - i - 1) // 12)
-        month_name = calendar.month_name[month_idx]
+    for period in periods:
+        attendance_labels.append(calendar.month_abbr[period % 100]) # Short name (Jan, Feb)
         
-        attendance_labels.append(month_name[:3]) # Short name (Jan, Feb)
-        
-        avg_att = db.session.query(func.avg(Payroll.attendance_days)).filter_by(
-            month=month_name, year=year
-        ).scalar()
+        summary = summaries.get(period)
+        avg_att = summary.payroll_attendance_days / summary.payroll_count if summary and summary.payroll_count else None
         attendance_data.append(round(avg_att, 1) if avg_att else 0)
 
     # 3. Department Distribution
-    dept_results = db.session.query(
-        Employee.department, func.count(Employee.id)
-    ).group_by(Employee.department).all()
-    
     dept_labels = []
     dept_data = []
     
-    for dept, count in dept_results:
-        dept_labels.append(dept if dept else "Unassigned")
-        dept_data.append(count)
+    for d in dept_summaries:
+        if not d.headcount:
+            continue
+        dept_labels.append(d.department if d.department else "Unassigned")
+        dept_data.append(d.headcount)
         
     if not dept_labels:
         dept_labels = ["No Data"]
         dept_data = [0]
 
-    employees = Employee.query.all()
+    employees, next_cursor = employee_page(limit=PAGE_SIZE)
+
+    return render_template('dashboard.html', user=user, total_employees=total_employees, payroll_processed=f"${payroll_processed:,.2f}", pending_reports=pending_reports, compliance_issues=compliance_issues, attendance_labels=attendance_labels, attendance_data=attendance_data, dept_labels=dept_labels, dept_data=dept_data, employees=employees, next_cursor=next_cursor)
 
-    return render_template('dashboard.html', user=user, total_employees=total_employees, payroll_processed=f"${payroll_processed:,.2f}", pending_reports=pending_reports, compliance_issues=compliance_issues, attendance_labels=attendance_labels, attendance_data=attendance_data, dept_labels=dept_labels, dept_data=dept_data, employees=employees)
\ No newline at end of file
+@dashboard_bp.cli.command('rebuild-summaries')
+@click.option('--company', 'company_id', type=int, default=None, help='Only rebuild this company (default: all).')
+def rebuild_summaries_command(company_id):
+    """Recompute the dashboard summary tables from payrolls, attendance and employees."""
+    with scope(resolve_company_id(company_id)) if company_id is not None else unscoped():
+        periods, departments = rebuild_summaries()
+    click.echo(f'Rebuilt {periods} period and {departments} department summaries.')
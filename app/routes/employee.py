@@ -1,6 +1,12 @@
 from flask import Blueprint, render_template, session, redirect, url_for, flash, request, jsonify
-from app.models.model import User, Employee, Payroll, db
+from app.models.model import User, Employee, db
+from app.models.archive import payroll_history
+from app.models.rollup import record_employee
+from app.models.employee_import import import_employees
+from app.tenancy import company_option, current_company_id
+from app.models.pagination import employee_page, employee_to_dict, page_size, PAGE_SIZE
 from datetime import datetime
+import click
 
 employee_bp = Blueprint('employee', __name__)
 
@@ -14,6 +20,11 @@ def employee_dashboard():
         if session.get('user_role') != 'admin':
             flash('Unauthorized: Only admins can add employees.')
             return redirect(url_for('employee.employee_dashboard'))
+        if current_company_id() is None:
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return jsonify({'success': False, 'message': 'Set up the company first'}), 400
+            flash('Set up the company before adding employees.')
+            return redirect(url_for('company.company_settings'))
 
         try:
             name = request.form.get('name')
@@ -29,6 +40,7 @@ def employee_dashboard():
 
             new_emp = Employee(name=name, email=email, designation=designation, department=department, basic_salary=salary, joining_date=join_date, pan=pan, uan=uan, pf_number=pf_number, esi_number=esi_number)
             db.session.add(new_emp)
+            record_employee(new_emp)
             db.session.commit()
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -62,18 +74,84 @@ def employee_dashboard():
         employee_data = Employee.query.filter_by(email=user.email).first()
         payrolls = []
         if employee_data:
-            payrolls = Payroll.query.filter_by(employee_id=employee_data.id).order_by(Payroll.year.desc(), Payroll.month.desc()).all()
-            # Calculate breakdown for display
-            for p in payrolls:
-                attendance = p.attendance_days if p.attendance_days is not None else 0.0
-                earned_basic = (employee_data.basic_salary / 30) * attendance
-                p.gross = round(earned_basic, 2)
-                p.pf = round(earned_basic * 0.12, 2)
-                p.esi = round(earned_basic * 0.0075, 2)
-                p.total_deductions = round(p.pf + p.esi, 2)
+            payrolls = payroll_history(employee_data.id)
         else:
             flash('Employee profile not found. Please contact HR to link your account.')
         return render_template('employee.html', user=user, employee=employee_data, payrolls=payrolls)
 
-    employees = Employee.query.all()
-    return render_template('employee.html', user=user, employees=employees)
\ No newline at end of file
+    department = request.args.get('department') or None
+    employees, next_cursor = employee_page(limit=PAGE_SIZE, department=department)
+    return render_template('employee.html', user=user, employees=employees, next_cursor=next_cursor)
+
+@employee_bp.route('/api/employees')
+def employee_api():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        employees, next_cursor = employee_page(
+            cursor=request.args.get('cursor'),
+            limit=page_size(request.args.get('limit')),
+            department=request.args.get('department') or None
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify({'items': [employee_to_dict(e) for e in employees], 'next_cursor': next_cursor})
+
+@employee_bp.route('/employee/import', methods=['POST'])
+def import_employees_upload():
+    is_xhr = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        if is_xhr:
+            return jsonify({'error': 'Unauthorized'}), 401
+        flash('Unauthorized: Only admins can import employees.')
+        return redirect(url_for('auth.login'))
+    if current_company_id() is None:
+        if is_xhr:
+            return jsonify({'error': 'Set up the company first'}), 400
+        flash('Set up the company before importing employees.')
+        return redirect(url_for('company.company_settings'))
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        if is_xhr:
+            return jsonify({'error': 'Choose a CSV or XLSX file to import'}), 400
+        flash('Choose a CSV or XLSX file to import.')
+        return redirect(url_for('employee.employee_dashboard'))
+
+    try:
+        result = import_employees(upload.stream, upload.filename, dry_run=bool(request.form.get('dry_run')))
+    except ValueError as e:
+        if is_xhr:
+            return jsonify({'error': str(e)}), 400
+        flash(f'Import failed: {str(e)}')
+        return redirect(url_for('employee.employee_dashboard'))
+
+    if is_xhr:
+        return jsonify(result.to_dict())
+
+    flash(f'{result.imported} employees imported, {result.rejected} rows rejected.')
+    for error in result.errors[:10]:
+        flash(f"Row {error['row']}: {'; '.join(error['errors'])}")
+    return redirect(url_for('employee.employee_dashboard'))
+
+@employee_bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=None, help='Rows inserted per batch')
+@click.option('--dry-run', is_flag=True, help='Validate the file without writing anything')
+@company_option
+def import_employees_command(path, batch_size, dry_run):
+    """Import employees from a CSV or XLSX file."""
+    with open(path, 'rb') as f:
+        try:
+            result = import_employees(f, path, dry_run=dry_run, **({'batch_size': batch_size} if batch_size else {}))
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    verb = 'valid' if dry_run else 'imported'
+    click.echo(f'{result.imported} employees {verb}, {result.rejected} rows rejected.')
+    for error in result.errors:
+        click.echo(f"  row {error['row']} ({error['email']}): {'; '.join(error['errors'])}")
+    if result.rejected > len(result.errors):
+        click.echo(f'  ... {result.rejected - len(result.errors)} more rejected rows not listed')
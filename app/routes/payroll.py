@@ -1,9 +1,27 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from app.models.model import User, Employee, Payroll, Attendance, db
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from app.models.model import User, Employee, Payroll, Attendance, db, period_key
+from app.models.payroll_run import close_month
+from app.models.archive import check_open, close_financial_year, financial_year_label
+from app.models.payroll_calc import calculate_payroll, payslips
+from app.models.rollup import record_payrolls
+from app.models.attendance_import import upsert_attendance, ingest_attendance
+from app.models.pagination import (
+    payroll_page, employee_options, payroll_to_dict, page_size, parse_period, PAGE_SIZE
+)
+from app.tenancy import company_option, current_company_id
 from datetime import datetime
+import calendar
+import click
 
 payroll_bp = Blueprint('payroll', __name__)
 
+def _ledger_filters(args):
+    return {
+        'period': parse_period(args.get('period')),
+        'department': args.get('department') or None,
+        'employee_id': args.get('employee_id', type=int),
+    }
+
 @payroll_bp.route('/payroll')
 def payroll_dashboard():
     if 'user_id' not in session:
@@ -13,24 +31,51 @@ def payroll_dashboard():
         flash('Unauthorized access.')
         return redirect(url_for('employee.employee_dashboard'))
 
-    # Fetch payrolls sorted by most recent
-    payrolls = Payroll.query.order_by(Payroll.year.desc(), Payroll.month.desc()).all()
-    employees = Employee.query.all()
-    return render_template('payroll.html', payrolls=payrolls, employees=employees)
+    try:
+        filters = _ledger_filters(request.args)
+    except ValueError:
+        flash('Invalid period filter.')
+        filters = {}
+
+    # First page of payrolls sorted by most recent; the rest is loaded from /api/payrolls
+    payrolls, next_cursor = payroll_page(limit=PAGE_SIZE, **filters)
+    employees = employee_options()
+    return render_template('payroll.html', payrolls=payrolls, next_cursor=next_cursor, employees=employees)
+
+@payroll_bp.route('/api/payrolls')
+def payroll_api():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        payrolls, next_cursor = payroll_page(
+            cursor=request.args.get('cursor'),
+            limit=page_size(request.args.get('limit')),
+            **_ledger_filters(request.args)
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor or filter'}), 400
+
+    return jsonify({'items': [payroll_to_dict(p) for p in payrolls], 'next_cursor': next_cursor})
 
 @payroll_bp.route('/payroll/generate', methods=['POST'])
 def generate_payroll():
     if 'user_id' not in session or session.get('user_role') != 'admin':
         return redirect(url_for('auth.login'))
+    if current_company_id() is None:
+        flash('Set up the company before generating payroll.')
+        return redirect(url_for('company.company_settings'))
 
     try:
         employee_id = request.form.get('employee_id')
         month = request.form.get('month')
         year = int(request.form.get('year'))
+        period = period_key(month, year)
+        check_open(period)
         
         # Robust Attendance Fetching
         # 1. Try fetching from Attendance DB
-        attendance_record = Attendance.query.filter_by(employee_id=employee_id, month=month, year=year).first()
+        attendance_record = Attendance.query.filter_by(employee_id=employee_id, period=period).first()
         
         if attendance_record:
             attendance_days = attendance_record.present_days
@@ -53,37 +98,25 @@ def generate_payroll():
             return redirect(url_for('payroll.payroll_dashboard'))
 
         # Check if payroll already exists for this period
-        existing = Payroll.query.filter_by(employee_id=employee_id, month=month, year=year).first()
+        existing = Payroll.query.filter_by(employee_id=employee_id, period=period).first()
         if existing:
             flash(f'Payroll for {employee.name} for {month} {year} already exists.')
             return redirect(url_for('payroll.payroll_dashboard'))
 
         # --- Payroll Calculation Logic ---
-        # Standardizing month to 30 days for calculation
-        total_working_days = 30 
-        
-        # 1. Calculate Earned Basic Salary (Pro-rata based on attendance)
-        # Formula: (Basic / 30) * Days Present
-        earned_basic = (employee.basic_salary / total_working_days) * attendance_days
-        
-        # 2. Calculate Deductions
-        # PF: 12% of Earned Basic
-        pf_deduction = earned_basic * 0.12
-        # ESI: 0.75% of Earned Basic
-        esi_deduction = earned_basic * 0.0075
-        
-        # 3. Calculate Net Salary
-        net_salary = earned_basic - pf_deduction - esi_deduction
+        payslip = payslips(calculate_payroll([employee.basic_salary], [attendance_days]))[0]
 
         new_payroll = Payroll(
             employee_id=employee_id,
             month=month,
             year=year,
+            period=period,
             attendance_days=attendance_days,
-            net_salary=round(net_salary, 2)
+            **payslip
         )
 
         db.session.add(new_payroll)
+        record_payrolls([new_payroll])
         db.session.commit()
 
         flash(f'Payroll generated! Net Salary: Rs. {new_payroll.net_salary}')
@@ -92,24 +125,115 @@ def generate_payroll():
 
     return redirect(url_for('payroll.payroll_dashboard'))
 
+@payroll_bp.route('/payroll/close-month', methods=['POST'])
+def close_month_payroll():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return redirect(url_for('auth.login'))
+
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if current_company_id() is None:
+        if is_ajax:
+            return jsonify({'success': False, 'message': 'Set up the company first'}), 400
+        flash('Set up the company before closing a month.')
+        return redirect(url_for('company.company_settings'))
+    try:
+        month = request.form.get('month')
+        year = int(request.form.get('year'))
+        default_days = request.form.get('default_days')
+        default_days = float(default_days) if default_days else None
+
+        created, skipped = close_month(month, year, default_days=default_days)
+
+        if is_ajax:
+            return jsonify({'success': True, 'created': created, 'skipped': skipped})
+
+        flash(f'Month close for {month} {year}: {created} payrolls generated, {len(skipped)} skipped.')
+        for item in skipped:
+            flash(f"Skipped {item['name']} (ID {item['employee_id']}): {item['reason']}")
+    except Exception as e:
+        if is_ajax:
+            return jsonify({'success': False, 'message': str(e)}), 500
+        flash(f'Error closing month: {str(e)}')
+
+    return redirect(url_for('payroll.payroll_dashboard'))
+
+@payroll_bp.cli.command('close-month')
+@click.option('--month', required=True, type=click.Choice(calendar.month_name[1:]), help='Month name, e.g. January')
+@click.option('--year', required=True, type=int)
+@click.option('--default-days', type=float, default=None,
+              help='Attendance days to use for employees without an attendance record')
+@company_option
+def close_month_command(month, year, default_days):
+    """Generate payroll for all employees for one month."""
+    created, skipped = close_month(month, year, default_days=default_days)
+    click.echo(f'{created} payrolls generated for {month} {year}, {len(skipped)} skipped.')
+    for item in skipped:
+        click.echo(f"  skipped {item['employee_id']} {item['name']}: {item['reason']}")
+
+@payroll_bp.route('/payroll/close-year', methods=['POST'])
+def close_year_payroll():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return redirect(url_for('auth.login'))
+
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if current_company_id() is None:
+        if is_ajax:
+            return jsonify({'success': False, 'message': 'Set up the company first'}), 400
+        flash('Set up the company before closing a financial year.')
+        return redirect(url_for('company.company_settings'))
+    try:
+        start_year = int(request.form.get('year'))
+        moved = close_financial_year(start_year)
+
+        if is_ajax:
+            return jsonify({'success': True, 'moved': moved})
+
+        flash(f"Financial year {financial_year_label(start_year)} closed: {moved['payrolls']} payrolls and "
+              f"{moved['attendance']} attendance records archived.")
+    except Exception as e:
+        if is_ajax:
+            return jsonify({'success': False, 'message': str(e)}), 400 if isinstance(e, ValueError) else 500
+        flash(f'Error closing financial year: {str(e)}')
+
+    return redirect(url_for('payroll.payroll_dashboard'))
+
+@payroll_bp.cli.command('close-year')
+@click.option('--year', required=True, type=int,
+              help='Start year of the financial year, e.g. 2024 for April 2024 - March 2025')
+@company_option
+def close_year_command(year):
+    """Move a finished financial year (and all before it) to the archive tables."""
+    try:
+        moved = close_financial_year(year)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Financial year {financial_year_label(year)} closed: {moved['payrolls']} payrolls and "
+               f"{moved['attendance']} attendance records archived.")
+
 @payroll_bp.route('/attendance/update', methods=['POST'])
 def update_attendance():
     if 'user_id' not in session or session.get('user_role') != 'admin':
         return redirect(url_for('auth.login'))
+    if current_company_id() is None:
+        flash('Set up the company before recording attendance.')
+        return redirect(url_for('company.company_settings'))
     
     try:
         employee_id = request.form.get('employee_id')
         month = request.form.get('month')
         year = int(request.form.get('year'))
         present_days = float(request.form.get('present_days'))
+        period = period_key(month, year)
+        check_open(period)
 
-        attendance = Attendance.query.filter_by(employee_id=employee_id, month=month, year=year).first()
-        if attendance:
-            attendance.present_days = present_days
-        else:
-            attendance = Attendance(employee_id=employee_id, month=month, year=year, present_days=present_days)
-            db.session.add(attendance)
-        
+        if not db.session.get(Employee, int(employee_id)):
+            flash('Employee not found.')
+            return redirect(url_for('payroll.payroll_dashboard'))
+
+        upsert_attendance([{
+            'employee_id': int(employee_id), 'month': month, 'year': year,
+            'period': period, 'present_days': present_days,
+        }])
         db.session.commit()
         flash('Attendance record updated successfully.')
     except Exception as e:
@@ -117,12 +241,70 @@ def update_attendance():
     
     return redirect(url_for('payroll.payroll_dashboard'))
 
+@payroll_bp.route('/attendance/import', methods=['POST'])
+def import_attendance():
+    is_xhr = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        if is_xhr:
+            return jsonify({'error': 'Unauthorized'}), 401
+        return redirect(url_for('auth.login'))
+    if current_company_id() is None:
+        if is_xhr:
+            return jsonify({'error': 'Set up the company first'}), 400
+        flash('Set up the company before importing attendance.')
+        return redirect(url_for('company.company_settings'))
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        if is_xhr:
+            return jsonify({'error': 'Choose a CSV or XLSX file to import'}), 400
+        flash('Choose a CSV or XLSX file to import.')
+        return redirect(url_for('payroll.payroll_dashboard'))
+
+    try:
+        result = ingest_attendance(upload.stream, upload.filename)
+    except Exception as e:
+        if is_xhr:
+            return jsonify({'error': str(e)}), 400 if isinstance(e, ValueError) else 500
+        flash(f'Attendance import failed: {str(e)}')
+        return redirect(url_for('payroll.payroll_dashboard'))
+
+    if is_xhr:
+        return jsonify(result.to_dict())
+
+    flash(f'Attendance imported: {result.inserted} added, {result.updated} updated, {result.rejected} rejected.')
+    for error in result.to_dict()['errors'][:10]:
+        flash(f"Row {error['row']}: {'; '.join(error['errors'])}")
+    return redirect(url_for('payroll.payroll_dashboard'))
+
+@payroll_bp.cli.command('import-attendance')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', type=int, default=None, help='Rows applied per INSERT ... ON CONFLICT statement')
+@company_option
+def import_attendance_command(path, chunk_size):
+    """Insert or update attendance from a CSV or XLSX file."""
+    with open(path, 'rb') as f:
+        try:
+            result = ingest_attendance(f, path, **({'chunk_size': chunk_size} if chunk_size else {}))
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    click.echo(f'{result.inserted} attendance records added, {result.updated} updated, {result.rejected} rows rejected.')
+    for error in result.to_dict()['errors']:
+        click.echo(f"  row {error['row']}: {'; '.join(error['errors'])}")
+
 @payroll_bp.route('/payroll/delete/<int:id>')
 def delete_payroll(id):
     if 'user_id' in session and session.get('user_role') == 'admin':
         payroll = Payroll.query.get(id)
         if payroll:
+            try:
+                check_open(payroll.period)
+            except ValueError as e:
+                flash(f'Error deleting payroll: {str(e)}')
+                return redirect(url_for('payroll.payroll_dashboard'))
             db.session.delete(payroll)
+            record_payrolls([payroll], sign=-1)
             db.session.commit()
             flash('Payroll record deleted.')
     return redirect(url_for('payroll.payroll_dashboard'))
\ No newline at end of file
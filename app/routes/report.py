@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, session, redirect, url_for, flash, send_file, current_app, request
-from app.models.model import User, Employee, Company
-from app.models.Form_16 import generate_form16
-from app.models.muster_roll import generate_muster_roll
-from app.models.pf_esi import generate_pf_esi_summary
-import io
+from flask import Blueprint, render_template, session, redirect, url_for, flash, send_file, current_app, request, jsonify, make_response, Response, stream_with_context
+from app.models.model import User
+from app.models.reports import render_report, current_period, REPORT_FILENAMES, REPORT_TITLES, ADMIN_REPORTS
+from app.models.report_cache import ReportCache, report_fingerprint
+from app.models.pagination import parse_period
+from app.models.exports import build_export, EXPORT_FORMATS
+from app.models.report_jobs import submit_report_job, submit_form16_bulk_job, get_job, result_path
+from app.tenancy import current_company_id, keep_scope
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+import os
 
 report_bp = Blueprint('report', __name__)
 
@@ -21,6 +25,13 @@ def report():
         
     return render_template('report.html', user=user)
 
+def _report_cache():
+    return ReportCache(
+        current_app.config['REPORT_CACHE_DIR'],
+        max_bytes=current_app.config['REPORT_CACHE_MAX_MB'] * 1024 * 1024,
+        max_age=current_app.config['REPORT_CACHE_MAX_AGE'],
+    )
+
 @report_bp.route('/report/generate/<report_type>')
 def generate_report(report_type):
     if 'user_id' not in session:
@@ -28,101 +39,169 @@ def generate_report(report_type):
     
     user_id = session['user_id']
     user_role = session.get('user_role')
-    
-    # Fetch Company Details
-    company = Company.query.first()
-    company_data = {
-        'name': company.name if company else "XYZ Pvt Ltd",
-        'address': company.address if company else "Delhi NCR",
-        'pan': company.pan_number if company else "AAAPZ1234C",
-        'tan': company.tan_number if company else "DELC12345D",
-        'pf_code': company.pf_code if company else "DL/ABC/12345",
-        'esi_code': company.esi_code if company else "270000000000000001",
-        'pt_circle': company.pt_circle if company and company.pt_circle else "Delhi"
-    }
-
-    buffer = io.BytesIO()
-    filename = "Report.pdf"
-
-    if report_type == 'form16':
-        filename = f"Form16_{user_id}.pdf"
-        
-        # Fetch data for the logged-in user or a default employee
-        current_user = User.query.get(user_id)
-        employee = Employee.query.filter_by(email=current_user.email).first()
-        
-        # If admin or no matching employee, use the first employee found
-        if not employee:
-            employee = Employee.query.first()
-            
-        data = {}
-        if employee:
-            annual_salary = employee.basic_salary * 12
-            data = {
-                'name': employee.name,
-                'pan': employee.pan if employee.pan else "Not Found",
-                'uan': employee.uan if employee.uan else "Not Found",
-                'period': "FY 2025-26",
-                'amount_paid': f"Rs. {annual_salary:,.2f}",
-                'tax_deducted': f"Rs. {annual_salary * 0.05:,.2f}", # Assumed 5%
-                'tax_deposited': f"Rs. {annual_salary * 0.05:,.2f}",
-                'taxable_salary': f"Rs. {max(0, annual_salary - 50000):,.2f}" # Standard deduction
-            }
-        
-        generate_form16(buffer, data, company_data)
-        
-    elif report_type == 'muster':
-        if user_role != 'admin':
-            flash('Unauthorized: Only admins can generate Muster Roll.')
-            return redirect(url_for('report.report'))
-            
-        filename = f"MusterRoll_{user_id}.pdf"
-        
-        employees = Employee.query.all()
-        emp_list = []
-        for i, emp in enumerate(employees, 1):
-            emp_list.append({
-                'sl': str(i),
-                'name': emp.name,
-                'present': '26', # Mock attendance
-                'gross': f"{emp.basic_salary:.2f}",
-                'deduction': f"{emp.basic_salary * 0.1:.2f}",
-                'net': f"{emp.basic_salary * 0.9:.2f}",
-                'pf': f"{emp.basic_salary * 0.12:.2f}",
-                'esi': f"{emp.basic_salary * 0.0075:.2f}"
-            })
-            
-        generate_muster_roll(buffer, emp_list, company_data)
-        
-    elif report_type == 'pf_esi':
-        if user_role != 'admin':
-            flash('Unauthorized: Only admins can generate PF & ESI Summary.')
-            return redirect(url_for('report.report'))
-            
-        filename = f"PF_ESI_{user_id}.pdf"
-        
-        employees = Employee.query.all()
-        emp_list = []
-        for emp in employees:
-            pf = emp.basic_salary * 0.12
-            esi = emp.basic_salary * 0.0075
-            emp_list.append({
-                'name': emp.name,
-                'emp_pf': f"{pf:.2f}",
-                'employer_pf': f"{pf:.2f}", # Employer matches 12%
-                'total_pf': f"{pf * 2:.2f}",
-                'emp_esi': f"{esi:.2f}",
-                'employer_esi': f"{esi * (3.25/0.75):.2f}", # Employer 3.25% vs Employee 0.75%
-                'total_esi': f"{esi + (esi * (3.25/0.75)):.2f}"
-            })
-            
-        generate_pf_esi_summary(buffer, emp_list, company_data)
-    else:
+
+    if report_type not in REPORT_FILENAMES:
         flash('Invalid report type')
         return redirect(url_for('report.report'))
-        
-    buffer.seek(0)
+
+    if report_type in ADMIN_REPORTS and user_role != 'admin':
+        flash(f'Unauthorized: Only admins can generate {REPORT_TITLES[report_type]}.')
+        return redirect(url_for('report.report'))
+
+    try:
+        period = parse_period(request.args.get('period')) or current_period()
+    except ValueError:
+        flash('Invalid period.')
+        return redirect(url_for('report.report'))
+    # Form 16 is per financial year (start year), e.g. ?year=2025 for 2025-26
+    year = request.args.get('year', type=int)
+
+    # The fingerprint doubles as the ETag: a client that already has this
+    # exact report gets a 304 without any rendering
+    etag = report_fingerprint(report_type, user_id, period, year)
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+
+    cache = _report_cache()
+    report = cache.get(etag)
+    if not report:
+        # Rendered straight into the cache file and streamed from disk
+        report = cache.put(etag, lambda output: render_report(report_type, user_id, output, period=period, year=year))
+
     action = request.args.get('action', 'view')
     as_attachment = (action == 'download')
     
-    return send_file(buffer, as_attachment=as_attachment, download_name=filename, mimetype='application/pdf')
\ No newline at end of file
+    # Sent from the open file, which eviction by another worker cannot take
+    # away; its size is given explicitly so range requests still work
+    size = os.fstat(report.fileno()).st_size
+    response = send_file(
+        report, as_attachment=as_attachment, download_name=REPORT_FILENAMES[report_type].format(user_id=user_id),
+        mimetype='application/pdf', etag=etag, conditional=False
+    )
+    response.content_length = size
+    try:
+        response = response.make_conditional(request, accept_ranges=True, complete_length=size)
+    except RequestedRangeNotSatisfiable:
+        report.close()
+        raise
+    # Always revalidate: reports change whenever the underlying data does
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@report_bp.route('/report/export/<report_type>/<fmt>')
+def export_report(report_type, fmt):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    if fmt not in EXPORT_FORMATS.get(report_type, ()):
+        flash('Invalid export format')
+        return redirect(url_for('report.report'))
+
+    if report_type in ADMIN_REPORTS and session.get('user_role') != 'admin':
+        flash(f'Unauthorized: Only admins can export {REPORT_TITLES[report_type]}.')
+        return redirect(url_for('report.report'))
+
+    try:
+        period = parse_period(request.args.get('period')) or current_period()
+    except ValueError:
+        flash('Invalid period.')
+        return redirect(url_for('report.report'))
+
+    try:
+        body, mimetype, filename = build_export(report_type, fmt, period)
+    except ValueError as e:
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return jsonify({'error': str(e)}), 400
+        flash(str(e))
+        return render_template('report.html', user=User.query.get(session['user_id'])), 400
+    if hasattr(body, 'read'):
+        response = send_file(body, as_attachment=True, download_name=filename, mimetype=mimetype)
+    else:
+        # Rows are read from the database while the response is being sent
+        response = Response(stream_with_context(keep_scope(body)), mimetype=mimetype)
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@report_bp.route('/report/jobs/<report_type>', methods=['POST'])
+def submit_report(report_type):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if report_type not in REPORT_FILENAMES:
+        return jsonify({'error': 'Invalid report type'}), 400
+
+    if report_type in ADMIN_REPORTS and session.get('user_role') != 'admin':
+        return jsonify({'error': f'Only admins can generate {REPORT_TITLES[report_type]}.'}), 403
+
+    try:
+        # Resolved now, so a job queued near midnight on the 1st keeps its month
+        period = parse_period(request.args.get('period')) or current_period()
+    except ValueError:
+        return jsonify({'error': 'Invalid period'}), 400
+
+    job_id = submit_report_job(
+        current_app.config['REPORT_JOBS_DIR'], report_type, session['user_id'], current_company_id(),
+        max_workers=current_app.config['REPORT_WORKERS'], period=period, year=request.args.get('year', type=int)
+    )
+    return jsonify({
+        'job_id': job_id,
+        'status_url': url_for('report.report_status', job_id=job_id),
+    }), 202
+
+@report_bp.route('/report/jobs/form16_bulk', methods=['POST'])
+def submit_form16_bulk():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if session.get('user_role') != 'admin':
+        return jsonify({'error': 'Only admins can generate Form 16 for all employees.'}), 403
+
+    job_id = submit_form16_bulk_job(
+        current_app._get_current_object(), current_app.config['REPORT_JOBS_DIR'], session['user_id'],
+        current_company_id(), max_workers=current_app.config['REPORT_WORKERS'],
+        year=request.args.get('year', type=int)
+    )
+    return jsonify({
+        'job_id': job_id,
+        'status_url': url_for('report.report_status', job_id=job_id),
+    }), 202
+
+def _own_job(job_id):
+    job = get_job(current_app.config['REPORT_JOBS_DIR'], job_id)
+    if not job or job['user_id'] != session.get('user_id'):
+        return None
+    return job
+
+@report_bp.route('/report/jobs/<job_id>')
+def report_status(job_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    job = _own_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    if job['status'] == 'finished':
+        job['download_url'] = url_for('report.report_download', job_id=job_id)
+    return jsonify(job)
+
+@report_bp.route('/report/jobs/<job_id>/download')
+def report_download(job_id):
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+
+    job = _own_job(job_id)
+    if not job or job['status'] != 'finished':
+        flash('Report not found or not ready yet.')
+        return redirect(url_for('report.report'))
+
+    action = request.args.get('action', 'download')
+    return send_file(
+        result_path(current_app.config['REPORT_JOBS_DIR'], job),
+        as_attachment=(action == 'download'), download_name=job['filename'], mimetype=job['mimetype']
+    )
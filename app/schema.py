@@ -0,0 +1,99 @@
+from alembic.script import ScriptDirectory
+from flask import current_app
+from flask_migrate import upgrade
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+from app.models.model import db, MONTHS
+
+# The schema is versioned with Alembic (migrations/). A deploy compares the
+# revision stamped in the database with the newest migration script and only
+# runs migrations when they differ, so a no-op deploy costs one SELECT and
+# never inspects the catalog or issues DDL.
+
+def head_revision():
+    """Newest revision in migrations/ (read from the scripts, not the database)."""
+    config = current_app.extensions['migrate'].migrate.get_config()
+    return ScriptDirectory.from_config(config).get_current_head()
+
+def current_revision():
+    """Revision stamped in the database, or None if it was never migrated."""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except DBAPIError:
+        return None
+
+def is_up_to_date():
+    return current_revision() == head_revision()
+
+def _patch_legacy_tables():
+    """Add the columns and indexes the old startup ALTER scripts used to add.
+
+    Runs once, for databases created with create_all before the migrations
+    existed; the baseline migration then only creates the missing tables.
+    """
+    # The old scripts only ever worked on PostgreSQL (ADD COLUMN IF NOT EXISTS)
+    if db.engine.dialect.name != 'postgresql':
+        return
+
+    with db.engine.begin() as conn:
+        for statement in (
+            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS pan VARCHAR(20)",
+            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS uan VARCHAR(20)",
+            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS pf_number VARCHAR(20)",
+            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS esi_number VARCHAR(20)",
+            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS department VARCHAR(50)",
+            "ALTER TABLE payrolls ADD COLUMN IF NOT EXISTS attendance_days INTEGER DEFAULT 0",
+            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS pt_circle VARCHAR(50)",
+        ):
+            conn.execute(text(statement))
+
+        # Numeric pay period (yyyymm) with composite (employee_id, period) indexes
+        month_case = "CASE month " + " ".join(
+            f"WHEN '{name}' THEN {i}" for i, name in enumerate(MONTHS, 1)
+        ) + " END"
+        for table in ('payrolls', 'attendance'):
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS period INTEGER"))
+            conn.execute(text(f"UPDATE {table} SET period = year * 100 + {month_case} WHERE period IS NULL"))
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN period SET NOT NULL"))
+        # The old check-then-insert was racy, so duplicates may have slipped in
+        # before the unique indexes. Which row is right is for a person to
+        # decide: stop here (the transaction rolls back) and list them.
+        duplicates = []
+        for table in ('payrolls', 'attendance'):
+            rows = conn.execute(text(
+                f"SELECT employee_id, period, string_agg(id::text, ', ' ORDER BY id) FROM {table} "
+                "GROUP BY employee_id, period HAVING COUNT(*) > 1 ORDER BY employee_id, period"
+            ))
+            duplicates += [f"  {table}: employee {employee_id}, period {period}: ids {ids}"
+                           for employee_id, period, ids in rows]
+        if duplicates:
+            raise RuntimeError(
+                "Cannot add the unique (employee_id, period) indexes; delete all but one row of each:\n"
+                + "\n".join(duplicates)
+            )
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_payrolls_employee_period ON payrolls (employee_id, period)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_payrolls_period ON payrolls (period)"))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_attendance_employee_period ON attendance (employee_id, period)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_attendance_period ON attendance (period)"))
+
+def upgrade_database():
+    """Apply pending migrations; returns ``(from_revision, to_revision)``.
+
+    Does nothing beyond reading the version stamp when already at head.
+    """
+    current, head = current_revision(), head_revision()
+    if current == head:
+        return current, head
+
+    # Catalog inspection only happens here, on a database that was never stamped
+    legacy = current is None and inspect(db.engine).has_table('employees')
+    if legacy:
+        _patch_legacy_tables()
+    upgrade()
+    if legacy:
+        from app.models.rollup import rebuild_summaries
+        from app.tenancy import unscoped
+        with unscoped():
+            rebuild_summaries()
+    return current, head
@@ -3,11 +3,17 @@ document.addEventListener('DOMContentLoaded', function() {
     const userInput = document.getElementById('user-input');
     const sendBtn = document.getElementById('send-btn');
 
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
     function appendMessage(role, text, isError = false) {
         const align = role === 'You' ? 'justify-content-end' : 'justify-content-start';
         const bg = role === 'You' ? 'bg-primary text-white' : 'bg-white border shadow-sm';
         const textClass = isError ? 'text-danger' : '';
-        
+
         const html = `
             <div class="d-flex ${align} mb-3">
                 <div class="p-3 rounded ${bg} ${textClass}" style="max-width: 80%;">
@@ -17,41 +23,98 @@ document.addEventListener('DOMContentLoaded', function() {
         `;
         chatContainer.insertAdjacentHTML('beforeend', html);
         chatContainer.scrollTop = chatContainer.scrollHeight;
+        return chatContainer.lastElementChild;
+    }
+
+    // Request in flight, aborted by the Stop button or when the page is left
+    let controller = null;
+
+    function setBusy(busy) {
+        userInput.disabled = busy;
+        sendBtn.textContent = busy ? 'Stop' : 'Send';
+    }
+
+    // Parse complete "event: x\ndata: {...}" blocks out of the server-sent
+    // event stream and return the unfinished remainder
+    function parseEvents(buffer, onEvent) {
+        const blocks = buffer.split('\n\n');
+        const rest = blocks.pop();
+        blocks.forEach(function(block) {
+            let event = 'message';
+            let data = '';
+            block.split('\n').forEach(function(line) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        });
+        return rest;
     }
 
     async function sendMessage() {
+        if (controller) {
+            controller.abort();
+            return;
+        }
+
         const message = userInput.value.trim();
         if (!message) return;
 
-        appendMessage('You', message);
+        appendMessage('You', escapeHtml(message));
         userInput.value = '';
-        
-        // Disable input to prevent multiple sends
-        userInput.disabled = true;
-        sendBtn.disabled = true;
 
+        // Disable input to prevent multiple sends; the button becomes Stop
+        controller = new AbortController();
+        setBusy(true);
+
+        let reply = null;
         try {
-            const response = await fetch('/api/chat', {
+            const response = await fetch('/api/chat/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message: message })
+                body: JSON.stringify({ message: message }),
+                signal: controller.signal
             });
-            
-            const data = await response.json();
-            if (data.error) {
-                appendMessage('System', 'Error: ' + data.error, true);
-            } else {
-                appendMessage('AI', data.response);
+
+            if (!response.ok) {
+                const data = await response.json();
+                appendMessage('System', 'Error: ' + escapeHtml(data.error), true);
+                return;
+            }
+
+            reply = appendMessage('AI', '<span class="reply-text"></span>').querySelector('.reply-text');
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer = parseEvents(buffer + decoder.decode(value, { stream: true }), function(event, data) {
+                    if (event === 'token') {
+                        reply.textContent += data.text;
+                        chatContainer.scrollTop = chatContainer.scrollHeight;
+                    } else if (event === 'error') {
+                        appendMessage('System', 'Error: ' + escapeHtml(data.error), true);
+                    }
+                });
             }
         } catch (error) {
-            appendMessage('System', 'Network error occurred.', true);
+            if (error.name === 'AbortError') {
+                if (reply) reply.textContent += ' [stopped]';
+            } else {
+                appendMessage('System', 'Network error occurred.', true);
+            }
         } finally {
-            userInput.disabled = false;
-            sendBtn.disabled = false;
+            controller = null;
+            setBusy(false);
             userInput.focus();
         }
     }
 
+    window.addEventListener('beforeunload', function() {
+        if (controller) controller.abort();
+    });
+
     if (userInput) {
         userInput.addEventListener('keypress', function (e) {
             if (e.key === 'Enter') sendMessage();
@@ -61,4 +124,4 @@ document.addEventListener('DOMContentLoaded', function() {
     if (sendBtn) {
         sendBtn.addEventListener('click', sendMessage);
     }
-});
\ No newline at end of file
+});
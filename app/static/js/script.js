@@ -0,0 +1,79 @@
+// "Load more" for keyset-paginated tables.
+// A button with data-load-more="<api url>" data-cursor="<next cursor>"
+// data-target="<tbody id>" data-row="<renderer>" fetches the next page from
+// the JSON API and appends the rows to the table.
+document.addEventListener('DOMContentLoaded', function() {
+    function escapeHtml(value) {
+        return String(value ?? '').replace(/[&<>"']/g, function(c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    }
+
+    const rowRenderers = {
+        payroll: function(p) {
+            return `
+                <tr>
+                    <td>${escapeHtml(p.generated_at)}</td>
+                    <td>${escapeHtml(p.employee_name)}</td>
+                    <td>${escapeHtml(p.month)} ${escapeHtml(p.year)}</td>
+                    <td>${escapeHtml(p.attendance_days)} Days</td>
+                    <td class="fw-bold text-success">Rs. ${escapeHtml(p.net_salary)}</td>
+                    <td>
+                        ${p.archived
+                            ? '<span class="badge bg-secondary">Archived</span>'
+                            : `<a href="/payroll/delete/${encodeURIComponent(p.id)}" class="btn btn-sm btn-outline-danger" onclick="return confirm('Are you sure you want to delete this record?')">Delete</a>`}
+                    </td>
+                </tr>`;
+        },
+        employee: function(e) {
+            return `
+                <tr>
+                    <td>${escapeHtml(e.name)}</td>
+                    <td>${escapeHtml(e.designation)}</td>
+                    <td>${escapeHtml(e.department || '-')}</td>
+                    <td>${escapeHtml(e.email)}</td>
+                    <td>${escapeHtml(e.joining_date)}</td>
+                    <td>Rs. ${escapeHtml(e.basic_salary)}</td>
+                    <td><span class="badge bg-success">Active</span></td>
+                </tr>`;
+        },
+        employeeSummary: function(e) {
+            return `
+                <tr>
+                    <td>${escapeHtml(e.name)}</td>
+                    <td>${escapeHtml(e.designation)}</td>
+                    <td>${escapeHtml(e.email)}</td>
+                    <td>${escapeHtml(e.joining_date)}</td>
+                    <td>${escapeHtml(e.basic_salary)}</td>
+                </tr>`;
+        }
+    };
+
+    document.querySelectorAll('[data-load-more]').forEach(function(btn) {
+        btn.addEventListener('click', async function() {
+            const tbody = document.getElementById(btn.dataset.target);
+            const render = rowRenderers[btn.dataset.row];
+            const url = new URL(btn.dataset.loadMore, window.location.origin);
+            url.searchParams.set('cursor', btn.dataset.cursor);
+
+            btn.disabled = true;
+            try {
+                const response = await fetch(url);
+                const data = await response.json();
+                if (data.error) {
+                    throw new Error(data.error);
+                }
+                tbody.insertAdjacentHTML('beforeend', data.items.map(render).join(''));
+                if (data.next_cursor) {
+                    btn.dataset.cursor = data.next_cursor;
+                    btn.disabled = false;
+                } else {
+                    btn.remove();
+                }
+            } catch (error) {
+                btn.textContent = 'Could not load more rows. Retry';
+                btn.disabled = false;
+            }
+        });
+    });
+});
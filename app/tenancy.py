@@ -0,0 +1,139 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask import g, session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+import click
+from app.models.model import User, Employee, Company, TenantMixin, db
+
+# One deployment serves many companies. Every business table carries a
+# company_id; each request is bound to the signed-in user's company and every
+# ORM SELECT, UPDATE and DELETE on those tables is filtered to it, while new
+# rows get it as their default. Code that is bound to no company sees no
+# business rows: CLI commands and background jobs enter ``scope(company_id)``,
+# and only blocks that must span every company enter ``unscoped()``.
+
+_UNSCOPED = object()
+# None binds to no company, so business queries match no rows
+_company = ContextVar('company_id', default=None)
+
+def current_company_id():
+    """Company the current code is bound to, or None (unbound, unscoped or not set up yet)."""
+    company_id = _company.get()
+    return None if company_id is _UNSCOPED else company_id
+
+def is_scoped():
+    return _company.get() is not _UNSCOPED
+
+def current_company():
+    company_id = current_company_id()
+    return db.session.get(Company, company_id) if company_id is not None else None
+
+@contextmanager
+def scope(company_id):
+    """Run the block bound to ``company_id``."""
+    token = _company.set(company_id)
+    try:
+        yield
+    finally:
+        _company.reset(token)
+
+@contextmanager
+def unscoped():
+    """Run the block across all companies (e.g. to find which one an email belongs to)."""
+    token = _company.set(_UNSCOPED)
+    try:
+        yield
+    finally:
+        _company.reset(token)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _filter_to_company(orm_execute_state):
+    company_id = _company.get()
+    if company_id is _UNSCOPED:
+        return
+    if orm_execute_state.is_column_load or orm_execute_state.is_relationship_load:
+        return
+    if orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.statement = orm_execute_state.statement.options(with_loader_criteria(
+            TenantMixin, lambda cls: cls.company_id == company_id, include_aliases=True,
+        ))
+
+def keep_scope(iterable):
+    """Iterate ``iterable`` bound to the current company.
+
+    For streamed responses: Flask consumes them after the request's binding
+    is gone, so the binding is restored around each item.
+    """
+    # Captured now, while the request is still bound
+    company_id = _company.get()
+
+    def generate():
+        iterator = iter(iterable)
+        while True:
+            token = _company.set(company_id)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _company.reset(token)
+            yield item
+    return generate()
+
+def link_company(user):
+    """Attach an employee account without a company to the one that employs them.
+
+    The company is found by the account's email in the employee lists; an
+    email listed by more than one company is left unlinked rather than
+    guessed. Admins get their company by saving the company settings instead.
+    """
+    if user.company_id is None and user.role != 'admin':
+        with unscoped():
+            company_ids = db.session.scalars(
+                db.select(Employee.company_id).filter(Employee.email == user.email).distinct().limit(2)
+            ).all()
+        if len(company_ids) == 1:
+            user.company_id = company_ids[0]
+
+def resolve_company_id(company_id=None):
+    """``company_id`` if given, else the only company in the database."""
+    if company_id is not None:
+        if db.session.get(Company, company_id) is None:
+            raise click.BadParameter(f'No company with id {company_id}', param_hint='--company')
+        return company_id
+    ids = db.session.scalars(db.select(Company.id).limit(2)).all()
+    if len(ids) != 1:
+        raise click.UsageError('There are several companies (or none); pass --company ID')
+    return ids[0]
+
+def company_option(command):
+    """Add ``--company ID`` to a CLI command and run it scoped to that company."""
+    @click.option('--company', 'company_id', type=int, default=None,
+                  help='Company to act on (default: the only one).')
+    @wraps(command)
+    def wrapper(*args, company_id, **kwargs):
+        with scope(resolve_company_id(company_id)):
+            return command(*args, **kwargs)
+    return wrapper
+
+def init_app(app):
+    """Bind each request of ``app`` to the signed-in user's company."""
+    @app.before_request
+    def _bind_company():
+        company_id = None
+        if 'user_id' in session:
+            if 'company_id' not in session:
+                # Sessions from before tenancy, or a company created since
+                user = db.session.get(User, session['user_id'])
+                session['company_id'] = user.company_id if user else None
+            company_id = session['company_id']
+        # Signed-out requests are bound to no company and see no business rows
+        g.company_token = _company.set(company_id)
+
+    @app.teardown_request
+    def _unbind_company(exc):
+        token = g.pop('company_token', None)
+        if token is not None:
+            _company.reset(token)
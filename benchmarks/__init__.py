@@ -0,0 +1,14 @@
+"""Benchmarks for the payroll hot paths on synthetic data.
+
+Usage::
+
+    python -m benchmarks --size 10k --output bench_results.json
+    python -m benchmarks --size 1k --database postgresql://localhost/bench --baseline old.json
+
+A fresh database (a temporary SQLite file unless ``--database`` is given) is
+filled with a company, the requested number of employees and 24 months of
+attendance and payroll ending last month, with attendance but no payroll for
+the current month. Each scenario is then timed through the real routes or
+model functions and the results are written as JSON for release-to-release
+comparison.
+"""
@@ -0,0 +1,110 @@
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.chat_stub import ChatStub
+from benchmarks.data import SIZES
+
+SCHEMA_VERSION = 1
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    print(f'\nCompared with {baseline_path} (median, lower is better):')
+    for result in results:
+        old = baseline.get(result['name'])
+        if not old or not old['median_ms']:
+            print(f"  {result['name']:<28} (no baseline)")
+            continue
+        ratio = result['median_ms'] / old['median_ms']
+        print(f"  {result['name']:<28} {old['median_ms']:>10.1f} -> {result['median_ms']:>10.1f} ms  x{ratio:.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Time the payroll hot paths on synthetic data.')
+    parser.add_argument('--size', choices=sorted(SIZES, key=SIZES.get), default='1k', help='Number of employees.')
+    parser.add_argument('--months', type=int, default=24, help='Months of closed payroll history.')
+    parser.add_argument('--database', help='Database URL (default: a temporary SQLite file).')
+    parser.add_argument('--reuse', action='store_true', help='Benchmark an already filled --database as is.')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per scenario.')
+    parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='Run only these scenarios.')
+    parser.add_argument('--output', help='Write the results as JSON to this file.')
+    parser.add_argument('--baseline', help='Earlier --output file to compare against.')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='payroll-bench-')
+    os.environ['DATABASE_URL'] = args.database or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['REPORT_CACHE_DIR'] = os.path.join(workdir, 'report_cache')
+    os.environ['REPORT_JOBS_DIR'] = os.path.join(workdir, 'report_jobs')
+    os.environ['SLOW_REQUEST_SECONDS'] = '0'
+    # Chat completions go to a local stub so the client is timed without a network
+    stub = ChatStub().start()
+    os.environ['SARVAM_BASE_URL'] = stub.url
+    os.environ['SARVAM_API_KEY'] = 'stub-key'
+
+    # Imported late so the app reads the environment set above
+    from app import create_app
+    from app.models.model import Employee, db
+    from app.schema import upgrade_database
+    from app.tenancy import resolve_company_id, scope, unscoped
+    from benchmarks import data, scenarios
+
+    app = create_app()
+    with app.app_context():
+        upgrade_database()
+        with unscoped():
+            existing = db.session.query(Employee.id).count()
+        if args.reuse:
+            if not existing:
+                parser.error('--reuse needs a --database that already holds benchmark data')
+            print(f'Reusing {existing} employees in {db.engine.url.render_as_string()}')
+            counts = {'employees': existing}
+        else:
+            if existing:
+                parser.error('the database already has employees; pass --reuse or use an empty database')
+            print(f'Generating {args.size} dataset in {db.engine.url.render_as_string()}')
+            start = time.perf_counter()
+            counts = data.generate(SIZES[args.size], months=args.months)
+            print(f'  done in {time.perf_counter() - start:.1f}s')
+
+        print(f'Running scenarios ({args.repeats} runs each):')
+        with scope(resolve_company_id()):
+            results = scenarios.run(app, args.repeats, only=args.only)
+        stub.stop()
+        dialect = db.engine.dialect.name
+
+    report = {
+        'schema_version': SCHEMA_VERSION,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'dialect': dialect,
+        'size': args.size if not args.reuse else None,
+        'months': args.months,
+        'rows': counts,
+        'repeats': args.repeats,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Wrote {args.output}')
+    if args.baseline:
+        _compare(results, args.baseline)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Local stand-in for the chat completion API.
+
+Usage::
+
+    python -m benchmarks.chat_stub
+
+serves ``/v1/chat/completions`` on a free local port, runs the chat client
+against it (a whole reply, a streamed reply, both timeouts and a cancelled
+stream) and exits non-zero if any check fails. The benchmarks point
+SARVAM_BASE_URL at the same stub to time the client without a network.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import sys
+import threading
+import time
+
+import httpx
+
+REPLY = 'Total payroll for the Sales department last month was Rs. 12,34,567.'
+
+# Words of REPLY per streamed chunk
+WORDS_PER_CHUNK = 2
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        stub = self.server.stub
+        if self.path != '/v1/chat/completions':
+            self._send(404, {'error': 'not found'})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get('content-length', 0))) or b'{}')
+        stub.requests.append({'headers': dict(self.headers), 'body': body})
+        time.sleep(stub.first_byte_delay)
+        if body.get('stream'):
+            self._stream(stub)
+        else:
+            self._send(200, {
+                'id': 'stub', 'object': 'chat.completion', 'created': int(time.time()), 'model': body.get('model'),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': REPLY}}],
+            })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out before the reply was ready
+            self.close_connection = True
+
+    def _stream(self, stub):
+        self.send_response(200)
+        self.send_header('content-type', 'text/event-stream')
+        self.send_header('connection', 'close')
+        self.end_headers()
+        words = REPLY.split(' ')
+        try:
+            for i in range(0, len(words), WORDS_PER_CHUNK):
+                text = ' '.join(words[i:i + WORDS_PER_CHUNK]) + (' ' if i + WORDS_PER_CHUNK < len(words) else '')
+                chunk = {'choices': [{'index': 0, 'delta': {'content': text}}]}
+                self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+                self.wfile.flush()
+                time.sleep(stub.chunk_delay)
+            self.wfile.write(b'data: [DONE]\n\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            stub.disconnected.set()
+        self.close_connection = True
+
+class ChatStub:
+    """``/v1/chat/completions`` served from a background thread.
+
+    Whole replies are JSON; ``stream`` requests get REPLY as server-sent
+    events, WORDS_PER_CHUNK words at a time. ``first_byte_delay`` and
+    ``chunk_delay`` (seconds) slow the replies down, and ``disconnected``
+    is set when a client goes away mid-stream.
+    """
+
+    def __init__(self, first_byte_delay=0, chunk_delay=0):
+        self.first_byte_delay = first_byte_delay
+        self.chunk_delay = chunk_delay
+        self.requests = []
+        self.disconnected = threading.Event()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+def check(timeout=1.0):
+    """Run the chat client against a fresh stub; returns the failed checks."""
+    from app.models import chat_client
+    from app.models.chat_client import ChatTimeout, complete, stream_completion
+
+    messages = [{'role': 'user', 'content': 'What was the total payroll last month?'}]
+    failures = []
+
+    def expect(name, condition):
+        print(f"  {name:<24} {'ok' if condition else 'FAILED'}")
+        if not condition:
+            failures.append(name)
+
+    with ChatStub() as stub:
+        config = {
+            'SARVAM_API_KEY': 'stub-key', 'SARVAM_BASE_URL': stub.url,
+            'CHAT_TIMEOUT': timeout, 'CHAT_CONNECT_TIMEOUT': timeout, 'CHAT_MAX_CONNECTIONS': 2,
+        }
+        # The client is built once per process; build it for this stub
+        chat_client._client = chat_client._http = None
+
+        expect('complete', complete(config, messages) == REPLY)
+
+        expect('stream', ''.join(stream_completion(config, messages)) == REPLY)
+        sent = stub.requests[-1]
+        expect('stream request', sent['headers'].get('api-subscription-key') == 'stub-key'
+               and sent['body'].get('stream') is True)
+
+        stub.first_byte_delay = timeout * 1.5
+        try:
+            complete(config, messages)
+            expect('complete timeout', False)
+        except httpx.TimeoutException:
+            expect('complete timeout', True)
+        stub.first_byte_delay = 0
+
+        stub.chunk_delay = timeout / 3
+        try:
+            ''.join(stream_completion(config, messages))
+            expect('stream timeout', False)
+        except ChatTimeout:
+            expect('stream timeout', True)
+
+        stub.disconnected.clear()
+        stream = stream_completion(config, messages)
+        next(stream)
+        stream.close()
+        expect('stream cancel', stub.disconnected.wait(timeout * 5))
+
+    chat_client._client = chat_client._http = None
+    return failures
+
+def main():
+    print('Chat client against the local stub:')
+    return 1 if check() else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
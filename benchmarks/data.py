@@ -0,0 +1,112 @@
+from datetime import date
+from sqlalchemy import insert
+import random
+from app.models.model import User, Employee, Company, Attendance, Payroll, MONTHS, db
+from app.models.payroll_calc import calculate_payroll, payslips
+from app.models.pdf_stream import chunked
+from app.models.rollup import rebuild_summaries
+from app.tenancy import scope
+
+# Synthetic company for the benchmarks. Everything is derived from a seeded
+# random generator so two runs of the same size produce the same data.
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+
+ADMIN_EMAIL = 'bench-admin@example.com'
+EMPLOYEE_EMAIL = 'employee1@example.com'
+PASSWORD = 'benchmark'
+
+DEPARTMENTS = ['Sales', 'Operations', 'Finance', 'HR', 'IT', 'Production', 'Logistics', None]
+DESIGNATIONS = ['Associate', 'Executive', 'Senior Executive', 'Manager', 'Operator', 'Technician']
+
+BATCH_SIZE = 5000
+
+def recent_periods(months, today=None):
+    """``(month, year, period)`` for the ``months`` months before this one, oldest first."""
+    today = today or date.today()
+    periods = []
+    for back in range(months, 0, -1):
+        index = today.year * 12 + today.month - 1 - back
+        year, month = divmod(index, 12)
+        periods.append((MONTHS[month], year, year * 100 + month + 1))
+    return periods
+
+def open_period(today=None):
+    """``(month, year, period)`` of the current month, which has attendance but no payroll."""
+    today = today or date.today()
+    return MONTHS[today.month - 1], today.year, today.year * 100 + today.month
+
+def _employee_rows(count, rng):
+    for i in range(1, count + 1):
+        compliant = rng.random() > 0.1
+        yield {
+            'name': f'Employee {i}',
+            'email': f'employee{i}@example.com',
+            'designation': rng.choice(DESIGNATIONS),
+            'department': rng.choice(DEPARTMENTS),
+            'joining_date': date(2015 + rng.randrange(9), rng.randrange(1, 13), rng.randrange(1, 29)),
+            'basic_salary': float(rng.randrange(12_000, 150_000, 500)),
+            'pan': f'ABCDE{i % 10000:04d}F' if compliant else None,
+            'uan': f'{100000000000 + i}' if compliant else None,
+            'pf_number': f'DL/BEN/{i}' if compliant else None,
+            'esi_number': f'{2000000000 + i}' if compliant else None,
+        }
+
+def generate(employees, months=24, seed=42, log=print):
+    """Fill an empty schema with the synthetic company and return row counts."""
+    rng = random.Random(seed)
+
+    company = Company(
+        name='Benchmark Industries Pvt Ltd', address='Plot 7, Industrial Area, Delhi',
+        gst_number='07ABCDE1234F1Z5', pan_number='ABCDE1234F', tan_number='DELB12345C',
+        pf_code='DL/BEN/0001', esi_code='270000000000000007', pt_circle='Delhi',
+    )
+    db.session.add(company)
+    db.session.flush()
+    admin = User(name='Benchmark Admin', email=ADMIN_EMAIL, role='admin', company_id=company.id)
+    admin.password = PASSWORD
+    staff = User(name='Employee 1', email=EMPLOYEE_EMAIL, role='employee', company_id=company.id)
+    staff.password = PASSWORD
+    db.session.add_all([admin, staff])
+    db.session.commit()
+
+    with scope(company.id):
+        return _generate_staff(employees, months, rng, log)
+
+def _generate_staff(employees, months, rng, log):
+    log(f'  {employees} employees')
+    for batch in chunked(_employee_rows(employees, rng), BATCH_SIZE):
+        db.session.execute(insert(Employee), batch)
+    db.session.commit()
+
+    staff_rows = db.session.query(Employee.id, Employee.basic_salary).order_by(Employee.id).all()
+    ids = [e.id for e in staff_rows]
+    salaries = [e.basic_salary for e in staff_rows]
+    payroll_rows = attendance_rows = 0
+
+    for month, year, period in recent_periods(months) + [open_period()]:
+        is_open = period == open_period()[2]
+        log(f'  {month} {year}')
+        for start in range(0, employees, BATCH_SIZE):
+            batch_ids = ids[start:start + BATCH_SIZE]
+            days = [float(rng.choice((22, 24, 25, 26, 26, 27, 28, 30))) for _ in batch_ids]
+            db.session.execute(insert(Attendance), [
+                {'employee_id': e, 'month': month, 'year': year, 'period': period, 'present_days': d}
+                for e, d in zip(batch_ids, days)
+            ])
+            attendance_rows += len(batch_ids)
+            if is_open:
+                continue
+
+            slips = payslips(calculate_payroll(salaries[start:start + BATCH_SIZE], days))
+            db.session.execute(insert(Payroll), [
+                {'employee_id': e, 'month': month, 'year': year, 'period': period,
+                 'attendance_days': d, **slip}
+                for e, d, slip in zip(batch_ids, days, slips)
+            ])
+            payroll_rows += len(batch_ids)
+        db.session.commit()
+
+    log('  summaries')
+    rebuild_summaries()
+    return {'employees': employees, 'attendance': attendance_rows, 'payrolls': payroll_rows}
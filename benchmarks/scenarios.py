@@ -0,0 +1,149 @@
+from sqlalchemy import event
+import io
+import statistics
+import time
+from app.models.model import User, Employee, Payroll, db
+from app.models.chat_client import complete, stream_completion
+from app.models.chat_index import build_context, mark_stale
+from app.models.payroll_run import close_month
+from app.models.reports import render_report
+from benchmarks.data import ADMIN_EMAIL, EMPLOYEE_EMAIL, PASSWORD, open_period, recent_periods
+
+# Timed scenarios. Each one is a zero-argument callable run ``repeats`` times
+# after one untimed warm-up; writes that can only happen once (closing the
+# month) are timed on a single run.
+
+CHAT_QUESTION = 'What was the total payroll last month for the Sales department?'
+
+class StatementCounter:
+    """Counts SQL statements executed on ``engine`` while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+        return False
+
+def _summary(name, timings, statements):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {
+        'name': name,
+        'runs': len(timings),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'statements': round(statements / len(timings), 1),
+    }
+
+def _measure(app, name, fn, repeats, warmup=True):
+    if warmup:
+        fn()
+    timings = []
+    with StatementCounter(db.engine) as counter:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+            # Drop identity-map state so each run does its own loading
+            db.session.remove()
+    return _summary(name, timings, counter.count)
+
+def _client(app, email):
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError(f'Could not log in as {email}')
+    return client
+
+def _get(client, url):
+    def run():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {url} returned {response.status_code}')
+        response.get_data()
+    return run
+
+def scenarios(app, repeats):
+    """Yield ``(name, fn, repeats, warmup)`` for every benchmark."""
+    admin = _client(app, ADMIN_EMAIL)
+    employee = _client(app, EMPLOYEE_EMAIL)
+    admin_id = User.query.filter_by(email=ADMIN_EMAIL).one().id
+    month, year, period = open_period()
+
+    yield 'dashboard', _get(admin, '/dashboard'), repeats, True
+    yield 'payroll_ledger', _get(admin, '/payroll'), repeats, True
+    yield 'employee_dashboard_history', _get(employee, '/employee'), repeats, True
+
+    for report_type in ('form16', 'muster', 'pf_esi'):
+        def render(report_type=report_type):
+            render_report(report_type, admin_id, io.BytesIO())
+        yield f'report_{report_type}', render, repeats, True
+
+    for report_type, fmt in (('muster', 'csv'), ('pf_esi', 'xlsx')):
+        yield f'export_{report_type}_{fmt}', _get(admin, f'/report/export/{report_type}/{fmt}'), repeats, True
+    # Upload files need a generated payroll: use the last month before the open one
+    _, _, paid = recent_periods(1)[-1]
+    yield 'export_pf_esi_ecr', _get(admin, f'/report/export/pf_esi/ecr?period={paid}'), repeats, True
+
+    def context():
+        build_context(CHAT_QUESTION, app.config['CHAT_TOP_K'], app.config['CHAT_CONTEXT_CHARS'],
+                      app.config['CHAT_INDEX_TTL'], app.config['CHAT_INDEX_PERIODS'])
+    def rebuild_index():
+        mark_stale()
+        context()
+    yield 'chat_index_build', rebuild_index, repeats, True
+    yield 'chat_context', context, repeats, True
+
+    messages = [{'role': 'user', 'content': CHAT_QUESTION}]
+    def chat_complete():
+        complete(app.config, messages)
+    def chat_stream():
+        for _ in stream_completion(app.config, messages):
+            pass
+    yield 'chat_complete', chat_complete, repeats, True
+    yield 'chat_stream', chat_stream, repeats, True
+
+    # One new payroll per run for the open month, then close it for everyone else
+    pending = iter(e for e, in db.session.query(Employee.id).order_by(Employee.id).limit(repeats + 1))
+    def generate_one():
+        employee_id = next(pending)
+        stored = Payroll.query.filter_by(employee_id=employee_id, period=period)
+        before = stored.count()
+        response = admin.post('/payroll/generate', data={
+            'employee_id': employee_id, 'month': month, 'year': year,
+        })
+        if response.status_code != 302:
+            raise RuntimeError(f'POST /payroll/generate returned {response.status_code}')
+        # The route redirects on refusals too; only a stored payroll counts
+        if stored.count() == before:
+            raise RuntimeError(f'POST /payroll/generate created no payroll for employee {employee_id}')
+    yield 'generate_payroll_single', generate_one, repeats, True
+
+    def close():
+        created, _ = close_month(month, year)
+        if not created:
+            raise RuntimeError('close_month created no payrolls')
+    yield 'generate_payroll_batch', close, 1, False
+
+def run(app, repeats, only=None, log=print):
+    results = []
+    for name, fn, runs, warmup in scenarios(app, repeats):
+        if only and name not in only:
+            continue
+        result = _measure(app, name, fn, runs, warmup)
+        log(f"  {name:<28} median {result['median_ms']:>10.1f} ms  "
+            f"p95 {result['p95_ms']:>10.1f} ms  {result['statements']:>8} statements")
+        results.append(result)
+    return results
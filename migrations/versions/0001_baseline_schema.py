@@ -0,0 +1,147 @@
+"""baseline schema
+
+Tables that already exist are left alone, so databases created with
+db.create_all() before migrations existed can be upgraded from scratch
+(app.schema patches their columns first).
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 17:43:04.095182
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table):
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if _missing('companies'):
+        op.create_table('companies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('address', sa.String(length=255), nullable=True),
+        sa.Column('gst_number', sa.String(length=20), nullable=True),
+        sa.Column('pan_number', sa.String(length=20), nullable=True),
+        sa.Column('tan_number', sa.String(length=20), nullable=True),
+        sa.Column('pf_code', sa.String(length=20), nullable=True),
+        sa.Column('esi_code', sa.String(length=20), nullable=True),
+        sa.Column('pt_circle', sa.String(length=50), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if _missing('data_versions'):
+        op.create_table('data_versions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if _missing('department_summaries'):
+        op.create_table('department_summaries',
+        sa.Column('department', sa.String(length=50), nullable=False),
+        sa.Column('headcount', sa.Integer(), nullable=False),
+        sa.Column('compliance_issues', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('department')
+        )
+
+    if _missing('employees'):
+        op.create_table('employees',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('designation', sa.String(length=100), nullable=False),
+        sa.Column('joining_date', sa.Date(), nullable=False),
+        sa.Column('basic_salary', sa.Float(), nullable=False),
+        sa.Column('pan', sa.String(length=20), nullable=True),
+        sa.Column('uan', sa.String(length=20), nullable=True),
+        sa.Column('pf_number', sa.String(length=20), nullable=True),
+        sa.Column('esi_number', sa.String(length=20), nullable=True),
+        sa.Column('department', sa.String(length=50), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+        )
+
+    if _missing('period_summaries'):
+        op.create_table('period_summaries',
+        sa.Column('period', sa.Integer(), nullable=False),
+        sa.Column('payroll_count', sa.Integer(), nullable=False),
+        sa.Column('total_net', sa.Float(), nullable=False),
+        sa.Column('payroll_attendance_days', sa.Float(), nullable=False),
+        sa.Column('attendance_count', sa.Integer(), nullable=False),
+        sa.Column('present_days', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('period')
+        )
+
+    if _missing('users'):
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('role', sa.String(length=50), server_default='user', nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+        )
+
+    if _missing('attendance'):
+        op.create_table('attendance',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.String(length=20), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('period', sa.Integer(), nullable=False),
+        sa.Column('present_days', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('attendance', schema=None) as batch_op:
+            batch_op.create_index('ix_attendance_period', ['period'], unique=False)
+            batch_op.create_index('ux_attendance_employee_period', ['employee_id', 'period'], unique=True)
+
+    if _missing('payrolls'):
+        op.create_table('payrolls',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.String(length=20), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('period', sa.Integer(), nullable=False),
+        sa.Column('net_salary', sa.Float(), nullable=False),
+        sa.Column('attendance_days', sa.Float(), nullable=True),
+        sa.Column('generated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('payrolls', schema=None) as batch_op:
+            batch_op.create_index('ix_payrolls_period', ['period'], unique=False)
+            batch_op.create_index('ux_payrolls_employee_period', ['employee_id', 'period'], unique=True)
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('payrolls', schema=None) as batch_op:
+        batch_op.drop_index('ux_payrolls_employee_period')
+        batch_op.drop_index('ix_payrolls_period')
+
+    op.drop_table('payrolls')
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_index('ux_attendance_employee_period')
+        batch_op.drop_index('ix_attendance_period')
+
+    op.drop_table('attendance')
+    op.drop_table('users')
+    op.drop_table('period_summaries')
+    op.drop_table('employees')
+    op.drop_table('department_summaries')
+    op.drop_table('data_versions')
+    op.drop_table('companies')
+    # ### end Alembic commands ###
@@ -0,0 +1,74 @@
+"""store payslip components on payrolls
+
+Existing rows are backfilled from their stored net salary rather than the
+employee's current basic, which may have changed since the payslip was
+generated. The rates are the ones in force when this migration was written.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 21:05:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('gross_salary', 'earned_basic', 'pf', 'esi', 'employer_pf', 'employer_esi', 'total_deductions')
+
+PF_RATE = 0.12
+ESI_RATE = 0.0075
+EMPLOYER_PF_RATE = 0.12
+EMPLOYER_ESI_RATE = 0.0325
+
+BATCH_SIZE = 5000
+
+
+def _components(net_salary):
+    earned = net_salary / (1 - PF_RATE - ESI_RATE)
+    pf, esi = earned * PF_RATE, earned * ESI_RATE
+    return {
+        'gross_salary': round(earned, 2),
+        'earned_basic': round(earned, 2),
+        'pf': round(pf, 2),
+        'esi': round(esi, 2),
+        'employer_pf': round(earned * EMPLOYER_PF_RATE, 2),
+        'employer_esi': round(earned * EMPLOYER_ESI_RATE, 2),
+        'total_deductions': round(pf + esi, 2),
+    }
+
+
+def upgrade():
+    with op.batch_alter_table('payrolls', schema=None) as batch_op:
+        for name in COLUMNS:
+            batch_op.add_column(sa.Column(name, sa.Float(), nullable=True))
+
+    conn = op.get_bind()
+    update = sa.text(
+        'UPDATE payrolls SET ' + ', '.join(f'{name} = :{name}' for name in COLUMNS) + ' WHERE id = :id'
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text('SELECT id, net_salary FROM payrolls WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        conn.execute(update, [{'id': row.id, **_components(row.net_salary)} for row in rows])
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('payrolls', schema=None) as batch_op:
+        for name in COLUMNS:
+            batch_op.alter_column(name, existing_type=sa.Float(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('payrolls', schema=None) as batch_op:
+        for name in reversed(COLUMNS):
+            batch_op.drop_column(name)
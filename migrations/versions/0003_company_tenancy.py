@@ -0,0 +1,171 @@
+"""company_id on business tables
+
+Everything already in the database belongs to its one company (created as
+"My Company" if rows exist without one). The summary tables get
+(company_id, ...) primary keys and are copied over.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 22:31:47.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+TENANT_TABLES = ('employees', 'payrolls', 'attendance')
+
+
+def _default_company(conn):
+    company_id = conn.execute(sa.text('SELECT MIN(id) FROM companies')).scalar()
+    if company_id is None:
+        has_rows = any(
+            conn.execute(sa.text(f'SELECT 1 FROM {table} LIMIT 1')).first()
+            for table in ('users', 'employees')
+        )
+        if has_rows:
+            conn.execute(sa.text("INSERT INTO companies (name) VALUES ('My Company')"))
+            company_id = conn.execute(sa.text('SELECT MIN(id) FROM companies')).scalar()
+    return company_id
+
+
+def _email_unique_constraint(conn):
+    for constraint in sa.inspect(conn).get_unique_constraints('employees'):
+        if constraint['column_names'] == ['email']:
+            return constraint['name']
+    return None
+
+
+def upgrade():
+    conn = op.get_bind()
+    company_id = _default_company(conn)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('company_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_users_company_id', ['company_id'], unique=False)
+        batch_op.create_foreign_key('fk_users_company_id', 'companies', ['company_id'], ['id'])
+    if company_id is not None:
+        conn.execute(sa.text('UPDATE users SET company_id = :company_id'), {'company_id': company_id})
+
+    for table in TENANT_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('company_id', sa.Integer(), nullable=True))
+        if company_id is not None:
+            conn.execute(sa.text(f'UPDATE {table} SET company_id = :company_id'), {'company_id': company_id})
+
+    # SQLite keeps the email constraint unnamed; name it so batch mode can drop it
+    naming = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+    email_constraint = _email_unique_constraint(conn) or 'uq_employees_email'
+    with op.batch_alter_table('employees', schema=None, naming_convention=naming) as batch_op:
+        batch_op.alter_column('company_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_employees_company_id', 'companies', ['company_id'], ['id'])
+        batch_op.drop_constraint(email_constraint, type_='unique')
+        batch_op.create_index('ux_employees_company_email', ['company_id', 'email'], unique=True)
+        batch_op.create_index('ix_employees_company_id', ['company_id', 'id'], unique=False)
+        batch_op.create_index('ix_employees_company_department', ['company_id', 'department', 'id'], unique=False)
+
+    for table in ('payrolls', 'attendance'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('company_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key(f'fk_{table}_company_id', 'companies', ['company_id'], ['id'])
+            batch_op.drop_index(f'ix_{table}_period')
+            batch_op.drop_index(f'ux_{table}_employee_period')
+            batch_op.create_index(f'ix_{table}_company_period', ['company_id', 'period'], unique=False)
+            batch_op.create_index(f'ux_{table}_company_employee_period', ['company_id', 'employee_id', 'period'], unique=True)
+
+    op.rename_table('period_summaries', 'period_summaries_old')
+    op.create_table('period_summaries',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.Integer(), nullable=False),
+    sa.Column('payroll_count', sa.Integer(), nullable=False),
+    sa.Column('total_net', sa.Float(), nullable=False),
+    sa.Column('payroll_attendance_days', sa.Float(), nullable=False),
+    sa.Column('attendance_count', sa.Integer(), nullable=False),
+    sa.Column('present_days', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    # Named: the renamed old table still holds the default pkey name on PostgreSQL
+    sa.PrimaryKeyConstraint('company_id', 'period', name='pk_period_summaries')
+    )
+    op.rename_table('department_summaries', 'department_summaries_old')
+    op.create_table('department_summaries',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('department', sa.String(length=50), nullable=False),
+    sa.Column('headcount', sa.Integer(), nullable=False),
+    sa.Column('compliance_issues', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('company_id', 'department', name='pk_department_summaries')
+    )
+    if company_id is not None:
+        conn.execute(sa.text(
+            'INSERT INTO period_summaries (company_id, period, payroll_count, total_net, '
+            'payroll_attendance_days, attendance_count, present_days) '
+            'SELECT :company_id, period, payroll_count, total_net, payroll_attendance_days, '
+            'attendance_count, present_days FROM period_summaries_old'
+        ), {'company_id': company_id})
+        conn.execute(sa.text(
+            'INSERT INTO department_summaries (company_id, department, headcount, compliance_issues) '
+            'SELECT :company_id, department, headcount, compliance_issues FROM department_summaries_old'
+        ), {'company_id': company_id})
+    op.drop_table('period_summaries_old')
+    op.drop_table('department_summaries_old')
+
+
+def downgrade():
+    # Summaries of all companies are merged back into one set
+    op.rename_table('period_summaries', 'period_summaries_new')
+    op.create_table('period_summaries',
+    sa.Column('period', sa.Integer(), nullable=False),
+    sa.Column('payroll_count', sa.Integer(), nullable=False),
+    sa.Column('total_net', sa.Float(), nullable=False),
+    sa.Column('payroll_attendance_days', sa.Float(), nullable=False),
+    sa.Column('attendance_count', sa.Integer(), nullable=False),
+    sa.Column('present_days', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('period')
+    )
+    op.execute(
+        'INSERT INTO period_summaries (period, payroll_count, total_net, payroll_attendance_days, '
+        'attendance_count, present_days) '
+        'SELECT period, SUM(payroll_count), SUM(total_net), SUM(payroll_attendance_days), '
+        'SUM(attendance_count), SUM(present_days) FROM period_summaries_new GROUP BY period'
+    )
+    op.drop_table('period_summaries_new')
+    op.rename_table('department_summaries', 'department_summaries_new')
+    op.create_table('department_summaries',
+    sa.Column('department', sa.String(length=50), nullable=False),
+    sa.Column('headcount', sa.Integer(), nullable=False),
+    sa.Column('compliance_issues', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('department')
+    )
+    op.execute(
+        'INSERT INTO department_summaries (department, headcount, compliance_issues) '
+        'SELECT department, SUM(headcount), SUM(compliance_issues) FROM department_summaries_new GROUP BY department'
+    )
+    op.drop_table('department_summaries_new')
+
+    for table in ('attendance', 'payrolls'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ux_{table}_company_employee_period')
+            batch_op.drop_index(f'ix_{table}_company_period')
+            batch_op.create_index(f'ix_{table}_period', ['period'], unique=False)
+            batch_op.create_index(f'ux_{table}_employee_period', ['employee_id', 'period'], unique=True)
+            batch_op.drop_constraint(f'fk_{table}_company_id', type_='foreignkey')
+            batch_op.drop_column('company_id')
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_index('ix_employees_company_department')
+        batch_op.drop_index('ix_employees_company_id')
+        batch_op.drop_index('ux_employees_company_email')
+        batch_op.create_unique_constraint('employees_email_key', ['email'])
+        batch_op.drop_constraint('fk_employees_company_id', type_='foreignkey')
+        batch_op.drop_column('company_id')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_users_company_id', type_='foreignkey')
+        batch_op.drop_index('ix_users_company_id')
+        batch_op.drop_column('company_id')
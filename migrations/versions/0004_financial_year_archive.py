@@ -0,0 +1,90 @@
+"""archive tables for closed financial years
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 23:48:05.631927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('archived_through', sa.Integer(), nullable=True))
+
+    op.create_table('payrolls_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.String(length=20), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('period', sa.Integer(), nullable=False),
+    sa.Column('net_salary', sa.Float(), nullable=False),
+    sa.Column('attendance_days', sa.Float(), nullable=True),
+    sa.Column('gross_salary', sa.Float(), nullable=False),
+    sa.Column('earned_basic', sa.Float(), nullable=False),
+    sa.Column('pf', sa.Float(), nullable=False),
+    sa.Column('esi', sa.Float(), nullable=False),
+    sa.Column('employer_pf', sa.Float(), nullable=False),
+    sa.Column('employer_esi', sa.Float(), nullable=False),
+    sa.Column('total_deductions', sa.Float(), nullable=False),
+    sa.Column('generated_at', sa.DateTime(), nullable=True),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('payrolls_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_payrolls_archive_company_employee_period', ['company_id', 'employee_id', 'period'], unique=False)
+        batch_op.create_index('ix_payrolls_archive_company_period', ['company_id', 'period'], unique=False)
+
+    op.create_table('attendance_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.String(length=20), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('period', sa.Integer(), nullable=False),
+    sa.Column('present_days', sa.Float(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('attendance_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_archive_company_employee_period', ['company_id', 'employee_id', 'period'], unique=False)
+        batch_op.create_index('ix_attendance_archive_company_period', ['company_id', 'period'], unique=False)
+
+
+def downgrade():
+    # Archived rows go back to the hot tables before the archive is dropped
+    op.execute(
+        'INSERT INTO attendance (id, employee_id, month, year, period, present_days, company_id) '
+        'SELECT id, employee_id, month, year, period, present_days, company_id FROM attendance_archive'
+    )
+    op.execute(
+        'INSERT INTO payrolls (id, employee_id, month, year, period, net_salary, attendance_days, '
+        'gross_salary, earned_basic, pf, esi, employer_pf, employer_esi, total_deductions, generated_at, company_id) '
+        'SELECT id, employee_id, month, year, period, net_salary, attendance_days, '
+        'gross_salary, earned_basic, pf, esi, employer_pf, employer_esi, total_deductions, generated_at, company_id '
+        'FROM payrolls_archive'
+    )
+
+    with op.batch_alter_table('attendance_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_archive_company_period')
+        batch_op.drop_index('ix_attendance_archive_company_employee_period')
+    op.drop_table('attendance_archive')
+
+    with op.batch_alter_table('payrolls_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_payrolls_archive_company_period')
+        batch_op.drop_index('ix_payrolls_archive_company_employee_period')
+    op.drop_table('payrolls_archive')
+
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.drop_column('archived_through')
@@ -0,0 +1,53 @@
+"""per-employee financial-year salary totals
+
+Filled from the payrolls already generated, archived ones included. TDS is
+the 5% estimate Form 16 has always assumed.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:42:18.204577
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+TDS_RATE = 0.05
+
+
+def upgrade():
+    op.create_table('salary_ytd',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('financial_year', sa.Integer(), nullable=False),
+    sa.Column('payroll_count', sa.Integer(), nullable=False),
+    sa.Column('gross_salary', sa.Float(), nullable=False),
+    sa.Column('total_deductions', sa.Float(), nullable=False),
+    sa.Column('net_salary', sa.Float(), nullable=False),
+    sa.Column('tds', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('company_id', 'employee_id', 'financial_year')
+    )
+
+    # Financial years are closed whole, so no year is split between the two tables
+    for table in ('payrolls', 'payrolls_archive'):
+        op.execute(
+            'INSERT INTO salary_ytd (company_id, employee_id, financial_year, payroll_count, '
+            'gross_salary, total_deductions, net_salary, tds) '
+            'SELECT company_id, employee_id, fy, COUNT(*), SUM(gross_salary), SUM(total_deductions), '
+            f'SUM(net_salary), SUM(gross_salary) * {TDS_RATE} '
+            'FROM (SELECT *, period / 100 - CASE WHEN period % 100 < 4 THEN 1 ELSE 0 END AS fy '
+            f'FROM {table}) AS p '
+            'GROUP BY company_id, employee_id, fy'
+        )
+
+
+def downgrade():
+    op.drop_table('salary_ytd')
@@ -0,0 +1,43 @@
+"""one chat data version per company
+
+Every company starts from the old shared version, so answers cached by
+running processes under the old counter are not served again.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 01:36:12.480913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    version = op.get_bind().execute(sa.text('SELECT MAX(version) FROM data_versions')).scalar() or 0
+    op.drop_table('data_versions')
+    op.create_table('data_versions',
+    sa.Column('company_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+    op.execute(sa.text('INSERT INTO data_versions (company_id, version) SELECT id, :version FROM companies')
+               .bindparams(version=version))
+
+
+def downgrade():
+    version = op.get_bind().execute(sa.text('SELECT MAX(version) FROM data_versions')).scalar() or 0
+    op.drop_table('data_versions')
+    op.create_table('data_versions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(sa.text('INSERT INTO data_versions (id, version) VALUES (1, :version)').bindparams(version=version))
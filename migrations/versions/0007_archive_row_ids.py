@@ -0,0 +1,50 @@
+"""own ids for archived payroll and attendance rows
+
+The archives kept the ids of the rows they moved, but SQLite hands the ids
+of deleted rows out again, so a second close could collide with the first.
+The moved id is kept in source_id and the archives number their own rows.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 02:14:57.063218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+TABLES = ('payrolls_archive', 'attendance_archive')
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('source_id', sa.Integer(), nullable=True))
+        op.execute(f'UPDATE {table} SET source_id = id')
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('source_id', existing_type=sa.Integer(), nullable=False)
+
+        # SQLite numbers INTEGER PRIMARY KEY rows itself; PostgreSQL needs a sequence
+        if postgresql:
+            op.execute(f'CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id')
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+            op.execute(f"SELECT setval('{table}_id_seq', COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)")
+
+
+def downgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for table in TABLES:
+        if postgresql:
+            op.execute(f'ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT')
+            op.execute(f'DROP SEQUENCE {table}_id_seq')
+        # Fails if rows archived by different closes share a source id
+        op.execute(f'UPDATE {table} SET id = source_id')
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('source_id')